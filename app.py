@@ -10,12 +10,15 @@ import os
 _stderr = sys.stderr
 sys.stderr = open(os.devnull, 'w')
 try:
-    from models.forecast_model import PriceForecastModel
+    from models.forecast_model import PriceForecastModel, ForecastRecord
+    from models.online_forecaster import OnlineForecaster
+    from models.drift_monitor import DriftMonitor
 finally:
     sys.stderr.close()
     sys.stderr = _stderr
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from apscheduler.schedulers.background import BackgroundScheduler
 import pandas as pd
@@ -23,10 +26,27 @@ import numpy as np
 import json
 import os
 from datetime import datetime
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 import threading
+import time
+import re
+import atexit
 
 from utils.notifications import NotificationManager
 from utils.data_generator import initialize_data
+from utils.state_store import StateStore
+from utils.price_index import PriceIndex
+from utils.rollups import RESOLUTIONS, merge_bars
+from utils.event_broker import EventBroker
+from utils.price_log import PriceLog
+from utils.sqlite_store import RevisionReader, SQLiteStore
+from utils.price_schema import normalize_prices
+from utils.serialization import (
+    HISTORY_COLUMNS, PayloadCache, date_string, encode_json, history_payload, history_records, json_default,
+    ohlc_payload, price_columns
+)
+from utils.downsampling import METHODS as DOWNSAMPLING_METHODS, downsample_indices
 from utils.price_scraper import get_scraper, CommodityPriceScraper
 from utils.po_generator import get_po_generator
 from utils.supply_chain_analyzer import get_supply_chain_analyzer
@@ -42,98 +62,211 @@ except ImportError:
 
 import config
 
+class AppJSONProvider(DefaultJSONProvider):
+    """jsonify() through encode_json, so handlers can return NumPy values as-is"""
+    
+    default = staticmethod(json_default)
+    
+    def dumps(self, obj, **kwargs):
+        return encode_json(obj).decode('utf-8')
+
 app = Flask(__name__)
+app.json = AppJSONProvider(app)
 CORS(app)
 
 # Global variables
-price_data = None
-inventory_data = None
-vendor_data = None
+# Price history, inventory and vendors; see utils/state_store.py
+state_store = StateStore()
 forecast_model = None
+online_forecaster = None
+drift_monitor = None
 notification_manager = None
 price_scraper = None
-forecast_results = {}
-last_update = None
+# Published forecast results; replaced as a whole so readers never see a partial update
+forecast_state = {'results': {}, 'last_update': None}
 last_scrape_time = None
 preferred_supplier_analyzer = None
+# Price, forecast and alert deltas pushed to /api/stream clients
+event_broker = EventBroker(buffer_size=config.STREAM_BUFFER_SIZE)
+# Latest price sent to stream clients per material, so price events carry only changes
+_streamed_prices = {}
+# Bumped when new forecast results are published
+forecast_version = 0
+# A range end with no time of day (parse_date_range)
+_DATE_ONLY = re.compile(r'\d{4}-\d{2}-\d{2}')
+# Distinguishes ETags across restarts, when the version counters start over
+_etag_epoch = format(int(time.time()), 'x')
+# Encoded history/forecast response bodies, keyed by data version
+payload_cache = PayloadCache()
 
-# Thread lock for data updates
-data_lock = threading.Lock()
-
-def convert_to_serializable(obj):
-    """Convert numpy types to native Python types for JSON serialization"""
-    if isinstance(obj, dict):
-        return {key: convert_to_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_serializable(item) for item in obj]
-    elif isinstance(obj, (np.integer, np.int64, np.int32)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    else:
-        return obj
+# Price history on disk: the CSV snapshot plus the rows appended since it was written
+price_log = PriceLog(
+    config.MATERIAL_PRICES_CSV, config.PRICE_LOG_CSV,
+    fsync_rows=config.PRICE_LOG_FSYNC_ROWS,
+    fsync_interval=config.PRICE_LOG_FSYNC_INTERVAL,
+    compact_rows=config.PRICE_LOG_COMPACT_ROWS,
+    columns_dir=config.PRICE_COLUMNS_DIR
+)
+
+# Shared store used instead of the files when STORAGE_BACKEND is 'sqlite'
+sqlite_store = None
+# Store revision the published snapshot was loaded from or written at
+store_revision = None
+# Price version of the newest snapshot whose prices are all in the store
+persisted_price_version = None
+# When the store was last checked for other processes' writes
+_last_store_check = 0.0
+
+# Persists price rows off the scrape path, one write at a time and in order
+persist_executor = ThreadPoolExecutor(max_workers=1)
+
+# How long price ingestion holds the state write lock
+ingest_stats = {'updates': 0, 'last_fetch_ms': None, 'last_lock_ms': None, 'max_lock_ms': 0.0}
+
+# Runs /api/batch sub-requests concurrently
+batch_executor = ThreadPoolExecutor(max_workers=config.BATCH_WORKERS)
+
+# State pinned for the current thread while it serves a batch sub-request
+_pinned = threading.local()
+
+# Prevents overlapping forecast runs (scheduler job vs. startup refresh)
+forecast_update_lock = threading.Lock()
+
+def read_data_files():
+    """
+    Read price history, inventory and vendors from the CSV/JSON files
+    
+    Returns:
+        Dict of snapshot field -> value, for StateStore.publish
+    """
+    changes = {}
+    
+    # Load price data
+    if not os.path.exists(config.MATERIAL_PRICES_CSV):
+        print("Initializing data...")
+        initialize_data(config.DATA_DIR)
+    # Replays the rows logged since the CSV was last compacted
+    changes['price_data'] = normalize_prices(price_log.load(), float32=config.PRICE_FLOAT32)
+    
+    # Load inventory
+    if os.path.exists(config.INVENTORY_JSON):
+        with open(config.INVENTORY_JSON, 'r') as f:
+            changes['inventory_data'] = json.load(f)
+    
+    # Load vendors
+    if os.path.exists(config.VENDORS_JSON):
+        with open(config.VENDORS_JSON, 'r') as f:
+            changes['vendor_data'] = json.load(f)
+    
+    return changes
 
 def load_data():
-    """Load all data from files"""
-    global price_data, inventory_data, vendor_data
+    """Load all data from the configured storage backend"""
+    if sqlite_store is None:
+        state_store.publish(**read_data_files())
+        return
     
-    with data_lock:
-        # Load price data
-        if os.path.exists(config.MATERIAL_PRICES_CSV):
-            price_data = pd.read_csv(config.MATERIAL_PRICES_CSV)
-        else:
-            print("Initializing data...")
-            initialize_data(config.DATA_DIR)
-            price_data = pd.read_csv(config.MATERIAL_PRICES_CSV)
-        
-        # Load inventory
-        if os.path.exists(config.INVENTORY_JSON):
-            with open(config.INVENTORY_JSON, 'r') as f:
-                inventory_data = json.load(f)
-        
-        # Load vendors
-        if os.path.exists(config.VENDORS_JSON):
-            with open(config.VENDORS_JSON, 'r') as f:
-                vendor_data = json.load(f)
+    if not sqlite_store.has_data():
+        # One-shot migration; a no-op if another process got there first
+        if sqlite_store.import_data(**read_data_files()):
+            print(f"[OK] Migrated data files into {config.DATABASE_PATH}")
+    load_from_store()
 
-def update_forecasts():
-    """Update price forecasts"""
-    global forecast_results, last_update
+def load_from_store():
+    """Publish a fresh snapshot of everything in the SQLite store"""
+    global store_revision, persisted_price_version
+    
+    with state_store.writing():
+        data, revision = sqlite_store.load()
+        data['price_data'] = normalize_prices(data['price_data'], float32=config.PRICE_FLOAT32)
+        snapshot = state_store.publish(**data)
+        store_revision = revision
+        persisted_price_version = snapshot.versions['price']
+    return snapshot
+
+def update_forecasts(materials=None):
+    """
+    Update price forecasts
+    
+    Args:
+        materials: Materials to retrain (default: all). Forecasts for other
+            materials are carried over from the current results.
+    """
+    global forecast_state, forecast_version
     
-    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Updating forecasts...")
+    if not forecast_update_lock.acquire(blocking=False):
+        print("[SKIP] Forecast update already in progress")
+        return
+    
+    materials = materials or config.MATERIALS
     
-    with data_lock:
+    try:
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Updating forecasts for {', '.join(materials)}...")
+        
+        # Snapshots are never modified, so training needs no copy and no lock
+        snapshot = state_store.snapshot()
+        
         try:
-            # Train models and generate forecasts
-            results = forecast_model.train_all_materials(price_data, config.MATERIALS)
-            forecast_results = results
-            last_update = datetime.now()
+            # Train on daily closes: intraday ticks would give the models
+            # several observations per day
+            daily = snapshot.rollups.close_frame('daily', materials)
+            trained = forecast_model.train_all_materials(
+                daily, materials,
+                n_workers=config.FORECAST_WORKERS,
+                engine=config.FORECAST_ENGINE,
+                price_index=PriceIndex(daily)
+            )
+            
+            results = dict(forecast_state['results'])
+            results.update(trained)
+            
+            # Publish with a single reference assignment
+            forecast_state = {'results': results, 'last_update': datetime.now()}
+            forecast_version += 1
+            drift_monitor.mark_trained([m for m, result in trained.items() if result is not None])
+            event_broker.publish('forecast', {
+                'materials': list(trained),
+                'recommendations': {
+                    material: result.recommendation['recommendation']
+                    for material, result in trained.items() if result is not None
+                },
+                'last_update': forecast_state['last_update'].isoformat()
+            })
             
             print(f"[SUCCESS] Forecasts updated successfully")
             
+            # Persist so the next startup can serve forecasts immediately
+            try:
+                forecast_model.save_cache(config.FORECAST_CACHE, results)
+            except Exception as e:
+                print(f"[ERROR] Error saving forecast cache: {str(e)}")
+            
             # Check for alerts
             check_alerts()
             
         except Exception as e:
             print(f"[ERROR] Error updating forecasts: {str(e)}")
+    finally:
+        forecast_update_lock.release()
 
 def check_alerts():
     """Check for price and inventory alerts"""
     try:
+        snapshot = state_store.snapshot()
+        price_index = snapshot.price_index
+        rollups = snapshot.rollups
+        
         # Get current prices
         current_prices = {}
         for material in config.MATERIALS:
-            latest_price = price_data[price_data['material'] == material]['price'].iloc[-1]
-            current_prices[material] = float(latest_price)
+            current_prices[material] = price_index.latest(material)['price']
         
-        # Get previous prices (from 1 day ago)
+        # Get previous prices (the previous day's close)
         previous_prices = {}
         for material in config.MATERIALS:
-            material_prices = price_data[price_data['material'] == material]['price']
-            if len(material_prices) > 1:
-                previous_prices[material] = float(material_prices.iloc[-2])
+            prev_price = rollups.previous_close(material, 'daily')
+            if prev_price is not None:
+                previous_prices[material] = prev_price
         
         # Check price alerts
         notification_manager.check_price_alerts(
@@ -144,14 +277,15 @@ def check_alerts():
         
         # Check inventory alerts
         notification_manager.check_inventory_alerts(
-            inventory_data,
+            snapshot.inventory_data,
             threshold=config.INVENTORY_THRESHOLD
         )
         
         # Check forecast-based alerts
+        forecast_results = forecast_state['results']
         if forecast_results:
             notification_manager.check_forecast_alerts(forecast_results)
-            notification_manager.check_reorder_alerts(inventory_data, forecast_results)
+            notification_manager.check_reorder_alerts(snapshot.inventory_data, forecast_results)
         
         # Clean up old alerts (keep last 30 days)
         notification_manager.clear_old_alerts(days=30)
@@ -159,74 +293,314 @@ def check_alerts():
     except Exception as e:
         print(f"Error checking alerts: {str(e)}")
 
+def check_forecast_drift():
+    """Retrain only the materials whose prices drifted from their forecast"""
+    due = drift_monitor.due_materials(config.MATERIALS)
+    if not due:
+        return
+    
+    reasons = ', '.join(f"{material} ({reason})" for material, reason in due.items())
+    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Forecast retrain due: {reasons}")
+    update_forecasts(list(due))
+
+def record_price_ticks(snapshot, timestamp):
+    """Feed the latest price of every material to the online forecaster and drift monitor"""
+    forecast_results = forecast_state['results']
+    price_index = snapshot.price_index
+    for material in config.MATERIALS:
+        latest_price = price_index.latest_price(material)
+        if latest_price is not None:
+            online_forecaster.update(material, latest_price, timestamp)
+            drift_monitor.observe(material, latest_price, forecast_results.get(material), timestamp)
+
+def publish_price_event(snapshot):
+    """Push the materials whose latest price changed to stream clients"""
+    price_index = snapshot.price_index
+    changed = {}
+    for material in config.MATERIALS:
+        latest = price_index.latest(material)
+        if latest is None:
+            continue
+        
+        price = round(latest['price'], 2)
+        if _streamed_prices.get(material) != price:
+            _streamed_prices[material] = price
+            changed[material] = {'price': price, 'date': date_string(latest['date'])}
+    
+    if changed:
+        event_broker.publish('prices', {'version': snapshot.versions['price'], 'prices': changed})
+
+def record_lock_hold(seconds, fetch_seconds=None):
+    """Record how long an ingestion step held the state write lock"""
+    lock_ms = seconds * 1000
+    ingest_stats['updates'] += 1
+    ingest_stats['last_lock_ms'] = round(lock_ms, 3)
+    ingest_stats['max_lock_ms'] = round(max(ingest_stats['max_lock_ms'], lock_ms), 3)
+    if fetch_seconds is not None:
+        ingest_stats['last_fetch_ms'] = round(fetch_seconds * 1000, 3)
+
+def save_price_data(price_data, new_rows, version=None):
+    """
+    Persist scraped or simulated rows (runs on the persistence thread)
+    
+    Appends only the new rows to the price log (or inserts them into the
+    SQLite store). Once the log is large enough the full history is
+    compacted into the CSV.
+    
+    Args:
+        price_data: Price history published with the new rows
+        new_rows: The rows added or modified; modified rows carry the seq
+            of the row they supersede in a replaces column
+        version: Price version of the snapshot price_data was published in
+    """
+    global store_revision, persisted_price_version
+    
+    try:
+        if sqlite_store is not None:
+            before, after = sqlite_store.append_prices(new_rows, keep_from=price_data['date'].min())
+            # If another process wrote in between, leave the revision stale so
+            # the next request reloads the merged history
+            if before == store_revision:
+                store_revision = after
+                persisted_price_version = version
+            return
+        
+        price_log.append(new_rows)
+        if price_log.needs_compaction():
+            price_log.compact(price_data)
+            print(f"[OK] Price log compacted into {config.MATERIAL_PRICES_CSV}")
+    except Exception as e:
+        print(f"[ERROR] Error saving price data: {str(e)}")
+
 def scrape_real_time_prices():
     """Scrape real-time prices from web sources"""
-    global price_data, last_scrape_time
+    global last_scrape_time
     
     if not config.ENABLE_REAL_TIME_SCRAPING:
         # Fall back to simulation if scraping is disabled
         simulate_price_update()
         return
     
-    with data_lock:
-        try:
-            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Scraping real-time prices...")
-            
-            # Use the scraper to update price data
-            price_data = price_scraper.update_price_data(price_data)
-            last_scrape_time = datetime.now()
-            
-            # Save updated data
-            price_data.to_csv(config.MATERIAL_PRICES_CSV, index=False)
-            
-            # Log current prices for verification
-            print(f"[OK] Real-time prices updated successfully")
-            for material in config.MATERIALS:
-                latest = price_data[price_data['material'] == material].iloc[-1]
-                print(f"  → {material}: ${float(latest['price']):.2f}/ton (date: {latest['date']})")
-            
-        except Exception as e:
-            print(f"✗ Error scraping prices: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            if config.USE_FALLBACK_ON_SCRAPE_FAIL:
-                print("  Falling back to simulated update...")
-                simulate_price_update()
+    try:
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Scraping real-time prices...")
+        
+        # Fetch phase: network requests run without holding any lock
+        fetch_start = time.perf_counter()
+        new_rows = price_scraper.fetch_latest_rows()
+        fetch_seconds = time.perf_counter() - fetch_start
+        
+        # Merge phase: only the in-memory append and publish hold the lock
+        with state_store.writing():
+            lock_start = time.perf_counter()
+            current = state_store.snapshot()
+            previous_seq = current.price_index.max_seq
+            price_data = price_scraper.merge_price_rows(current.price_data, new_rows)
+            snapshot = state_store.publish(price_data=price_data)
+            lock_seconds = time.perf_counter() - lock_start
+        record_lock_hold(lock_seconds, fetch_seconds)
+        
+        last_scrape_time = datetime.now()
+        record_price_ticks(snapshot, last_scrape_time)
+        publish_price_event(snapshot)
+        
+        # Persist phase: the snapshot's frame is never modified, so it can be
+        # written in the background
+        persist_executor.submit(
+            save_price_data, price_data, price_data[price_data['seq'] > previous_seq], snapshot.versions['price']
+        )
+        
+        # Log current prices for verification
+        print(f"[OK] Real-time prices updated successfully (fetch {fetch_seconds:.2f}s, lock {lock_seconds * 1000:.1f}ms)")
+        price_index = snapshot.price_index
+        for material in config.MATERIALS:
+            latest = price_index.latest(material)
+            print(f"  → {material}: ${latest['price']:.2f}/ton (date: {latest['date']})")
+        
+    except Exception as e:
+        print(f"✗ Error scraping prices: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        if config.USE_FALLBACK_ON_SCRAPE_FAIL:
+            print("  Falling back to simulated update...")
+            simulate_price_update()
 
 def simulate_price_update():
     """Simulate real-time price updates (fallback method)"""
     import numpy as np
     
-    with data_lock:
-        try:
+    try:
+        with state_store.writing():
+            lock_start = time.perf_counter()
+            current = state_store.snapshot()
+            price_index = current.price_index
+            
+            # Published snapshots are read without a lock, so change a copy
+            price_data = current.price_data.copy()
+            if 'replaces' not in price_data.columns:
+                price_data['replaces'] = np.zeros(len(price_data), dtype=np.int64)
+            next_seq = price_index.max_seq + 1
+            labels = []
+            
             # Add small random changes to latest prices
             for material in config.MATERIALS:
-                latest_row = price_data[price_data['material'] == material].iloc[-1].copy()
+                latest = price_index.latest(material)
                 
                 # Small random change
                 change_pct = np.random.uniform(-0.5, 0.5)
-                new_price = latest_row['price'] * (1 + change_pct / 100)
+                new_price = latest['price'] * (1 + change_pct / 100)
                 
-                # Update the latest price
-                price_data.loc[price_data['material'] == material, 'price'] = \
-                    price_data.loc[price_data['material'] == material, 'price'].iloc[:-1].tolist() + [new_price]
+                # Update the latest price; the modified row moves to the end of
+                # the sequence and records the seq it supersedes
+                labels.append(latest['label'])
+                price_data.at[latest['label'], 'replaces'] = price_data.at[latest['label'], 'seq']
+                price_data.at[latest['label'], 'price'] = price_data['price'].dtype.type(new_price)
+                price_data.at[latest['label'], 'seq'] = next_seq
+                next_seq += 1
+            
+            snapshot = state_store.publish(price_data=price_data)
+            lock_seconds = time.perf_counter() - lock_start
+        record_lock_hold(lock_seconds)
+        
+        # Persist the modified rows, so their new seqs survive a restart
+        persist_executor.submit(save_price_data, price_data, price_data.loc[labels], snapshot.versions['price'])
+        
+        record_price_ticks(snapshot, datetime.now())
+        publish_price_event(snapshot)
+        
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Prices updated (simulated)")
+        
+    except Exception as e:
+        print(f"Error updating prices: {str(e)}")
+
+@app.before_request
+def refresh_from_store():
+    """Pick up writes other backend processes made to the shared SQLite store"""
+    global _last_store_check
+    
+    if sqlite_store is None:
+        return
+    
+    now = time.monotonic()
+    if now - _last_store_check < config.STORAGE_REFRESH_INTERVAL:
+        return
+    _last_store_check = now
+    
+    if sqlite_store.revision() != store_revision:
+        publish_price_event(load_from_store())
+
+def price_lookup(snapshot):
+    """
+    Get what latest-price and history lookups read from
+    
+    Indexed queries against the SQLite store when it is configured and
+    holds every price of the snapshot, otherwise the snapshot's in-memory
+    index. Store lookups only answer while no other process has written
+    since (see RevisionReader), so a response and its ETag and cache key
+    always describe the same data. Inside /api/batch the snapshot's index is always
+    used, since the store may be written after the batch pinned its
+    snapshot. Both offer latest(), latest_price() and history().
+    """
+    if getattr(_pinned, 'snapshot', None) is not None:
+        return snapshot.price_index
+    if sqlite_store is not None and snapshot.versions['price'] == persisted_price_version:
+        return RevisionReader(sqlite_store, store_revision, snapshot.price_index)
+    return snapshot.price_index
+
+def current_snapshot():
+    """Get the state snapshot a request reads (the pinned one inside /api/batch)"""
+    snapshot = getattr(_pinned, 'snapshot', None)
+    return snapshot if snapshot is not None else state_store.snapshot()
+
+def current_forecast_state():
+    """Get the forecast results a request reads (the pinned ones inside /api/batch)"""
+    state = getattr(_pinned, 'forecast_state', None)
+    return state if state is not None else forecast_state
+
+def get_data_versions():
+    """Get the current version of each kind of served state"""
+    versions = current_snapshot().versions
+    return {
+        'price': versions['price'],
+        # Live forecasts change with every tick the online forecaster sees,
+        # which happens just after the price version is bumped
+        'forecast': f"{forecast_version}.{online_forecaster.version}" if online_forecaster else forecast_version,
+        'inventory': versions['inventory'],
+        'vendor': versions['vendor'],
+        'alert': notification_manager.version if notification_manager else 0
+    }
+
+def conditional(*kinds):
+    """
+    Answer conditional GETs from data versions
+    
+    The ETag is derived from the versions of the given kinds of state. A
+    request whose If-None-Match still matches gets a 304 before the handler
+    runs, so nothing is recomputed or serialized.
+    
+    Args:
+        kinds: State the endpoint's response depends on ('price', 'forecast',
+            'inventory', 'vendor', 'alert')
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            # Versions are read before the handler runs, so an ETag can only
+            # be older than the body it is sent with, never newer
+            versions = get_data_versions()
+            etag = _etag_epoch + '-' + '-'.join(f"{kind[0]}{versions[kind]}" for kind in kinds)
             
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Prices updated (simulated)")
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
             
-        except Exception as e:
-            print(f"Error updating prices: {str(e)}")
+            response = app.make_response(handler(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
+
+def parse_date_range():
+    """
+    Parse the start and end query parameters of a range request
+    
+    Ticks keep their time of day, so an end given as a plain date is taken
+    as the end of that day rather than its midnight.
+    
+    Returns:
+        Tuple of (start, end) Timestamps, each None when not given
+    
+    Raises:
+        ValueError: If either is not an ISO date or timestamp
+    """
+    start = pd.Timestamp(request.args['start']) if request.args.get('start') else None
+    end = None
+    if request.args.get('end'):
+        end = pd.Timestamp(request.args['end'])
+        if _DATE_ONLY.fullmatch(request.args['end'].strip()):
+            end += pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    return start, end
 
 # API Endpoints
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    last_update = current_forecast_state()['last_update']
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'last_update': last_update.isoformat() if last_update else None,
         'last_scrape': last_scrape_time.isoformat() if last_scrape_time else None,
-        'scraping_enabled': config.ENABLE_REAL_TIME_SCRAPING
+        'scraping_enabled': config.ENABLE_REAL_TIME_SCRAPING,
+        'forecast_cache': forecast_model.get_cache_stats() if forecast_model else None,
+        'forecast_drift': drift_monitor.get_status() if drift_monitor else None,
+        'payload_cache': payload_cache.get_stats(),
+        'ingest': dict(ingest_stats),
+        'storage': {'backend': config.STORAGE_BACKEND, 'revision': store_revision},
+        'price_log': price_log.get_stats(),
+        'stream': event_broker.get_stats()
     })
 
 @app.route('/api/materials', methods=['GET'])
@@ -238,105 +612,313 @@ def get_materials():
     })
 
 @app.route('/api/prices/current', methods=['GET'])
+@conditional('price')
 def get_current_prices():
     """Get current prices for all materials"""
-    with data_lock:
-        current_prices = []
+    snapshot = current_snapshot()
+    current_prices = []
+    prices = price_lookup(snapshot)
+    rollups = snapshot.rollups
+    
+    for material in config.MATERIALS:
+        latest = prices.latest(material)
         
-        for material in config.MATERIALS:
-            material_df = price_data[price_data['material'] == material]
-            latest = material_df.iloc[-1]
-            
-            # Calculate 24h change
-            if len(material_df) > 1:
-                prev_price = material_df.iloc[-2]['price']
-                change_pct = ((latest['price'] - prev_price) / prev_price) * 100
-            else:
-                change_pct = 0
-            
-            current_prices.append({
-                'material': material,
-                'price': round(latest['price'], 2),
-                'date': latest['date'],
-                'change_24h': round(change_pct, 2),
-                'volume': int(latest['volume']),
-                'source': latest['source']
-            })
+        # Calculate 24h change against the previous day's close
+        prev_price = rollups.previous_close(material, 'daily')
+        if prev_price is not None:
+            change_pct = ((latest['price'] - prev_price) / prev_price) * 100
+        else:
+            change_pct = 0
         
-        return jsonify({
-            'prices': current_prices,
-            'timestamp': datetime.now().isoformat()
+        current_prices.append({
+            'material': material,
+            'price': round(latest['price'], 2),
+            'date': date_string(latest['date']),
+            'change_24h': round(change_pct, 2),
+            'volume': int(latest['volume']),
+            'source': latest['source']
         })
+    
+    return jsonify({
+        'prices': current_prices,
+        'timestamp': datetime.now().isoformat()
+    })
 
 @app.route('/api/prices/historical/<material>', methods=['GET'])
+@conditional('price')
 def get_historical_prices(material):
-    """Get historical prices for a specific material"""
+    """
+    Get historical prices for a specific material
+    
+    Query parameters:
+        start, end: Inclusive date range (ISO dates or timestamps); an end
+            date without a time of day includes that whole day
+        max_points: Downsample to at most this many points (at least 4)
+        method: Downsampling method, 'lttb' (default) or 'minmax'
+        bins: Also return a histogram of every price in the range with this
+            many equal-width bins
+    """
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        material_df = price_data[price_data['material'] == material].copy()
-        material_df = material_df.sort_values('date')
-        
-        # Convert to native Python types for JSON serialization
-        history = []
-        for _, row in material_df.iterrows():
-            history.append({
-                'date': str(row['date']),
-                'material': str(row['material']),
-                'price': float(row['price']),
-                'volume': int(row['volume']),
-                'source': str(row['source'])
-            })
-        
-        return jsonify({
-            'material': material,
-            'history': history,
-            'count': len(history)
-        })
+    try:
+        start, end = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates'}), 400
+    
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None and max_points < 4:
+        return jsonify({'error': 'max_points must be an integer of at least 4'}), 400
+    
+    method = request.args.get('method', 'lttb')
+    if method not in DOWNSAMPLING_METHODS:
+        return jsonify({'error': f"method must be one of: {', '.join(DOWNSAMPLING_METHODS)}"}), 400
+    
+    bins = request.args.get('bins', type=int)
+    if bins is not None and not 1 <= bins <= 1000:
+        return jsonify({'error': 'bins must be an integer between 1 and 1000'}), 400
+    
+    snapshot = current_snapshot()
+    kind = ('history', start, end, max_points, method if max_points else None, bins)
+    payload = payload_cache.get_or_build(
+        kind, material, snapshot.versions['price'],
+        lambda: build_history_payload(price_lookup(snapshot), material, start, end, max_points, method, bins)
+    )
+    
+    return Response(payload, mimetype='application/json')
+
+def build_history_payload(prices_source, material, start=None, end=None, max_points=None, method='lttb', bins=None):
+    """
+    Encode a material's price history, limited to a date range and downsampled
+    
+    Summary statistics and the histogram always cover the full range, so
+    they stay exact when only a downsampled subset of the points is returned.
+    
+    Args:
+        prices_source: PriceIndex or RevisionReader (see price_lookup)
+        bins: Number of histogram bins, or None for no histogram
+    """
+    frame, dates, prices = prices_source.history(material, start, end)
+    positions = np.arange(len(prices))
+    
+    if max_points and len(positions) > max_points:
+        x = dates.astype(np.int64).astype(np.float64)
+        positions = downsample_indices(x, prices, max_points, method)
+    
+    summary = None
+    if len(prices) > 0:
+        summary = {
+            'min': round(float(prices.min()), 2),
+            'max': round(float(prices.max()), 2),
+            'mean': round(float(prices.mean()), 2),
+            'std': round(float(prices.std(ddof=1)), 2) if len(prices) > 1 else 0.0
+        }
+    
+    fields = {}
+    if bins:
+        counts, edges = np.histogram(prices, bins=bins)
+        fields['histogram'] = {'counts': counts, 'edges': edges.round(2)}
+    
+    return history_payload(
+        material, frame.iloc[positions],
+        total_count=len(prices),
+        downsampled=len(positions) < len(prices),
+        summary=summary,
+        **fields
+    )
+
+@app.route('/api/prices/ohlc/<material>', methods=['GET'])
+@conditional('price')
+def get_ohlc_prices(material):
+    """
+    Get open/high/low/close bars for a specific material
+    
+    Bars are read from the snapshot's rollups, which are kept up to date as
+    ticks arrive, so no request aggregates the raw ticks.
+    
+    Query parameters:
+        resolution: 'daily' (default) or 'hourly'
+        start, end: Inclusive range of bar start times (ISO dates or
+            timestamps); an end date without a time of day includes that whole day
+        max_points: Merge consecutive bars so at most this many are returned
+    """
+    if material not in config.MATERIALS:
+        return jsonify({'error': 'Material not found'}), 404
+    
+    resolution = request.args.get('resolution', 'daily')
+    if resolution not in RESOLUTIONS:
+        return jsonify({'error': f"resolution must be one of: {', '.join(RESOLUTIONS)}"}), 400
+    
+    try:
+        start, end = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates'}), 400
+    
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None and max_points < 1:
+        return jsonify({'error': 'max_points must be a positive integer'}), 400
+    
+    snapshot = current_snapshot()
+    payload = payload_cache.get_or_build(
+        ('ohlc', resolution, start, end, max_points), material, snapshot.versions['price'],
+        lambda: build_ohlc_payload(snapshot.rollups, material, resolution, start, end, max_points)
+    )
+    
+    return Response(payload, mimetype='application/json')
+
+def build_ohlc_payload(rollups, material, resolution, start=None, end=None, max_points=None):
+    """Encode a material's bars, limited to a range and merged down to max_points"""
+    bars = rollups.bars_for(material, resolution, start, end)
+    total = len(bars['time'])
+    if max_points:
+        bars = merge_bars(bars, max_points)
+    
+    return ohlc_payload(
+        material, resolution, bars,
+        total_count=total,
+        downsampled=len(bars['time']) < total
+    )
+
+@app.route('/api/prices/changes', methods=['GET'])
+@conditional('price')
+def get_price_changes():
+    """
+    Get price rows added or modified after a sequence number
+    
+    Every price row carries a seq that increases whenever a row is added or
+    changed. Mirrors pass the latest_seq of their previous call as since and
+    receive only the rows they have not seen. A modified row arrives under
+    its new seq with the superseded seq in replaces (null for new rows), so
+    mirrors drop that row. Rows dated before retained_from were dropped by
+    retention and are not reported one by one; mirrors trim to that date.
+    
+    Query parameters:
+        since: Last seq already seen (default 0: everything)
+        material: Restrict to one material
+        limit: Maximum rows per call (default 10000); follow next_since while has_more
+        format: 'rows' (default) or 'columnar' (one list per column)
+    """
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', 10000, type=int)
+    material = request.args.get('material')
+    response_format = request.args.get('format', 'rows')
+    
+    if response_format not in ('rows', 'columnar'):
+        return jsonify({'error': "format must be 'rows' or 'columnar'"}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    if material is not None and material not in config.MATERIALS:
+        return jsonify({'error': 'Material not found'}), 404
+    
+    price_index = current_snapshot().price_index
+    changed = price_index.frame.iloc[price_index.changes_since(since)]
+    if material is not None:
+        changed = changed[changed['material'] == material]
+    
+    has_more = len(changed) > limit
+    changed = changed.iloc[:limit]
+    columns = ('seq',) + HISTORY_COLUMNS + ('replaces',)
+    
+    body = {
+        'since': since,
+        'latest_seq': price_index.max_seq,
+        'retained_from': date_string(price_index.dates.min()) if len(price_index.dates) else None,
+        'next_since': int(changed['seq'].iloc[-1]) if len(changed) else max(since, price_index.max_seq),
+        'has_more': has_more,
+        'count': len(changed)
+    }
+    if response_format == 'columnar':
+        body['columns'] = price_columns(changed, columns)
+    else:
+        body['changes'] = history_records(changed, columns)
+    
+    return Response(encode_json(body), mimetype='application/json')
 
 @app.route('/api/forecast/<material>', methods=['GET'])
+@conditional('forecast', 'price')
 def get_forecast(material):
     """Get price forecast for a specific material"""
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
     
-    if material not in forecast_results or forecast_results[material] is None:
-        return jsonify({'error': 'Forecast not available'}), 503
+    state = current_forecast_state()
+    result = state['results'].get(material)
+    include_components = request.args.get('components', 'false').lower() == 'true'
     
-    result = forecast_results[material]
-    forecast_df = result['forecast']
+    # Read the version before building, so a concurrent tick can only leave
+    # a cached payload newer than its key, never older
+    ticks = online_forecaster.version if online_forecaster else None
+    version = (state['last_update'], ticks)
     
-    # Get future predictions only
-    future_forecast = forecast_df.tail(config.FORECAST_DAYS)
+    if not include_components:
+        payload = payload_cache.get('forecast', material, version)
+        if payload is not None:
+            return Response(payload, mimetype='application/json')
     
-    # Convert to native Python types for JSON serialization
-    forecast_list = []
-    for _, row in future_forecast.iterrows():
-        forecast_list.append({
-            'date': row['ds'].strftime('%Y-%m-%d'),
-            'predicted_price': float(round(row['yhat'], 2)),
-            'lower_bound': float(round(row['yhat_lower'], 2)),
-            'upper_bound': float(round(row['yhat_upper'], 2))
-        })
+    # Live forecast from the online filter reflects the latest tick
+    live_forecast = online_forecaster.forecast(material, periods=config.FORECAST_DAYS) if online_forecaster else None
+    live = None
+    if live_forecast is not None:
+        live = {
+            'forecast': ForecastRecord.from_frame(material, live_forecast).to_records(),
+            'recommendation': online_forecaster.get_recommendation(material, config.FORECAST_DAYS),
+            'last_tick': online_forecaster.last_tick(material).isoformat()
+        }
     
-    forecast_data = {
-        'material': material,
-        'forecast': forecast_list,
-        'recommendation': convert_to_serializable(result['recommendation'])
-    }
+    if result is None:
+        if live is None:
+            return jsonify({'error': 'Forecast not available'}), 503
+        
+        # Serve the online forecast until the model forecast is ready
+        forecast_data = {
+            'material': material,
+            'forecast': live['forecast'],
+            'recommendation': live['recommendation'],
+            'live': live
+        }
+    else:
+        forecast_data = {
+            'material': material,
+            'forecast': result.to_records(config.FORECAST_DAYS),
+            'recommendation': result.recommendation,
+            'live': live
+        }
     
-    return jsonify(forecast_data)
+    # Prophet components are computed only when asked for
+    if include_components and result is not None:
+        try:
+            components = forecast_model.get_components(material, periods=config.FORECAST_DAYS)
+            components['ds'] = components['ds'].dt.strftime('%Y-%m-%d')
+            forecast_data['components'] = components.to_dict(orient='list')
+        except Exception as e:
+            forecast_data['components'] = None
+            forecast_data['components_error'] = str(e)
+        
+        return jsonify(forecast_data)
+    
+    payload = encode_json(forecast_data)
+    payload_cache.put('forecast', material, version, payload)
+    return Response(payload, mimetype='application/json')
 
 @app.route('/api/recommendations', methods=['GET'])
+@conditional('forecast', 'price')
 def get_recommendations():
     """Get buy/wait recommendations for all materials"""
+    state = current_forecast_state()
+    forecast_results = state['results']
+    last_update = state['last_update']
+    live = request.args.get('live', 'false').lower() == 'true'
     recommendations = []
     
     for material in config.MATERIALS:
-        if material in forecast_results and forecast_results[material]:
-            rec = forecast_results[material]['recommendation']
-            recommendations.append(convert_to_serializable(rec))
+        if live and online_forecaster:
+            # Recommendations from the online filter, current as of the latest tick
+            rec = online_forecaster.get_recommendation(material, config.FORECAST_DAYS)
+            if rec:
+                recommendations.append(rec)
+        elif material in forecast_results and forecast_results[material]:
+            rec = forecast_results[material].recommendation
+            recommendations.append(rec)
     
     return jsonify({
         'recommendations': recommendations,
@@ -345,39 +927,43 @@ def get_recommendations():
     })
 
 @app.route('/api/inventory', methods=['GET'])
+@conditional('inventory')
 def get_inventory():
     """Get current inventory levels"""
-    with data_lock:
-        return jsonify({
-            'inventory': inventory_data,
-            'timestamp': datetime.now().isoformat()
-        })
+    snapshot = current_snapshot()
+    return jsonify({
+        'inventory': snapshot.inventory_data,
+        'timestamp': datetime.now().isoformat()
+    })
 
 @app.route('/api/inventory/<material>', methods=['GET'])
+@conditional('inventory')
 def get_material_inventory(material):
     """Get inventory for specific material"""
-    if material not in inventory_data:
+    snapshot = current_snapshot()
+    if material not in snapshot.inventory_data:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        return jsonify({
-            'material': material,
-            'inventory': inventory_data[material]
-        })
+    return jsonify({
+        'material': material,
+        'inventory': snapshot.inventory_data[material]
+    })
 
 @app.route('/api/vendors/<material>', methods=['GET'])
+@conditional('vendor')
 def get_vendors(material):
     """Get vendor comparison for a material"""
-    if material not in vendor_data:
+    snapshot = current_snapshot()
+    if material not in snapshot.vendor_data:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        return jsonify({
-            'material': material,
-            'vendors': vendor_data[material]
-        })
+    return jsonify({
+        'material': material,
+        'vendors': snapshot.vendor_data[material]
+    })
 
 @app.route('/api/alerts', methods=['GET'])
+@conditional('alert')
 def get_alerts():
     """Get recent alerts"""
     limit = request.args.get('limit', 10, type=int)
@@ -433,66 +1019,165 @@ def trigger_alert_check():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/dashboard/summary', methods=['GET'])
+@conditional('price', 'forecast', 'inventory', 'alert')
 def get_dashboard_summary():
     """Get complete dashboard summary"""
-    with data_lock:
-        # Current prices
-        current_prices = []
-        for material in config.MATERIALS:
-            latest = price_data[price_data['material'] == material].iloc[-1]
-            current_prices.append({
-                'material': material,
-                'price': float(round(latest['price'], 2))
-            })
-        
-        # Recommendations (convert numpy types to native Python types)
-        recommendations = []
-        for material in config.MATERIALS:
-            if material in forecast_results and forecast_results[material]:
-                rec = forecast_results[material]['recommendation']
-                recommendations.append(convert_to_serializable(rec))
-        
-        # Inventory status
-        low_stock_items = [
-            material for material, data in inventory_data.items()
-            if data['current_stock'] < data['min_threshold']
-        ]
+    state = current_forecast_state()
+    forecast_results = state['results']
+    last_update = state['last_update']
+    
+    snapshot = current_snapshot()
+    
+    # Current prices
+    current_prices = []
+    prices = price_lookup(snapshot)
+    for material in config.MATERIALS:
+        current_prices.append({
+            'material': material,
+            'price': float(round(prices.latest_price(material), 2))
+        })
+    
+    # Recommendations (convert numpy types to native Python types)
+    recommendations = []
+    for material in config.MATERIALS:
+        if material in forecast_results and forecast_results[material]:
+            rec = forecast_results[material].recommendation
+            recommendations.append(rec)
+    
+    # Inventory status
+    low_stock_items = [
+        material for material, data in snapshot.inventory_data.items()
+        if data['current_stock'] < data['min_threshold']
+    ]
+    
+    # Recent alerts
+    recent_alerts = notification_manager.get_recent_alerts(limit=5)
+    
+    return jsonify({
+        'current_prices': current_prices,
+        'recommendations': recommendations,
+        'inventory': {
+            'total_materials': len(snapshot.inventory_data),
+            'low_stock_count': len(low_stock_items),
+            'low_stock_items': low_stock_items
+        },
+        'alerts': {
+            'recent': recent_alerts,
+            'summary': notification_manager.get_alert_summary()
+        },
+        'last_update': last_update.isoformat() if last_update else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+# Event Stream Endpoint
+
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-sent events for price, forecast and alert changes
+    
+    Events: 'prices' (changed latest prices), 'forecast' (refit materials and
+    their new recommendations) and 'alert' (each new alert). Reconnecting
+    clients resume with the Last-Event-ID header (sent automatically by
+    EventSource) or ?last_event_id=. A 'reset' event means the missed events
+    are gone and the client should refetch everything.
+    """
+    resume_from = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    last_id = event_broker.parse_event_id(resume_from) if resume_from else event_broker.latest_id()
+    
+    def generate(last_id):
+        yield "retry: 3000\n\n"
         
-        # Recent alerts
-        recent_alerts = notification_manager.get_recent_alerts(limit=5)
+        while True:
+            events = event_broker.wait(last_id, config.STREAM_HEARTBEAT_INTERVAL) if last_id is not None else None
+            
+            if events is None:
+                last_id = event_broker.latest_id()
+                yield event_broker.format(last_id, 'reset', '{}')
+            elif not events:
+                # Keeps proxies from closing the idle connection
+                yield ": heartbeat\n\n"
+            
+            for event_id, event_type, data in events or []:
+                last_id = event_id
+                yield event_broker.format(event_id, event_type, data)
+    
+    return Response(
+        generate(last_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Batch Endpoint
+
+def run_batch_request(path, snapshot, pinned_forecast_state):
+    """
+    Serve one /api/batch sub-request against the batch's pinned state
+    
+    Args:
+        path: GET path, with or without the /api/ prefix (query string allowed)
+        snapshot: State snapshot shared by every sub-request of the batch
+        pinned_forecast_state: Forecast results shared by the batch
+    
+    Returns:
+        Dict with the path, status code and decoded JSON body
+    """
+    _pinned.snapshot = snapshot
+    _pinned.forecast_state = pinned_forecast_state
+    
+    try:
+        full_path = path if path.startswith('/api/') else '/api/' + path.lstrip('/')
         
-        return jsonify({
-            'current_prices': current_prices,
-            'recommendations': recommendations,
-            'inventory': {
-                'total_materials': len(inventory_data),
-                'low_stock_count': len(low_stock_items),
-                'low_stock_items': low_stock_items
-            },
-            'alerts': {
-                'recent': recent_alerts,
-                'summary': notification_manager.get_alert_summary()
-            },
-            'last_update': last_update.isoformat() if last_update else None,
-            'timestamp': datetime.now().isoformat()
-        })
+        with app.test_request_context(full_path, method='GET'):
+            if request.routing_exception is not None:
+                status = getattr(request.routing_exception, 'code', 404)
+                return {'path': path, 'status': status, 'body': {'error': str(request.routing_exception)}}
+            
+            try:
+                view = app.view_functions[request.url_rule.endpoint]
+                response = app.make_response(view(**request.view_args))
+            except Exception as e:
+                return {'path': path, 'status': 500, 'body': {'error': str(e)}}
+            
+            return {'path': path, 'status': response.status_code, 'body': response.get_json(silent=True)}
+    finally:
+        _pinned.snapshot = None
+        _pinned.forecast_state = None
 
-# Purchase Order Endpoints
+@app.route('/api/batch', methods=['POST'])
+def batch_request():
+    """
+    Fetch several GET resources in one round trip
+    
+    Body: {"paths": ["prices/current", "prices/historical/Copper", ...]}
+    
+    Sub-requests run concurrently, all against the same state snapshot, and
+    their results come back in request order.
+    """
+    data = request.get_json(silent=True) or {}
+    paths = data.get('paths')
+    
+    if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+        return jsonify({'error': 'paths must be a list of strings'}), 400
+    if len(paths) > config.BATCH_MAX_REQUESTS:
+        return jsonify({'error': f'At most {config.BATCH_MAX_REQUESTS} paths per batch'}), 400
+    
+    # Pin one snapshot so every sub-request sees the same prices and forecasts
+    snapshot = state_store.snapshot()
+    pinned_forecast_state = forecast_state
+    
+    futures = [
+        batch_executor.submit(run_batch_request, path, snapshot, pinned_forecast_state)
+        for path in paths
+    ]
+    
+    return jsonify({
+        'responses': [future.result() for future in futures],
+        'versions': dict(snapshot.versions),
+        'timestamp': datetime.now().isoformat()
+    })
 
-def convert_to_json_serializable(obj):
-    """Convert numpy types to native Python types for JSON serialization"""
-    if isinstance(obj, dict):
-        return {key: convert_to_json_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_json_serializable(item) for item in obj]
-    elif isinstance(obj, (np.integer, np.int64, np.int32)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    else:
-        return obj
+# Purchase Order Endpoints
 
 @app.route('/api/po/generate', methods=['POST'])
 def generate_purchase_order():
@@ -508,23 +1193,25 @@ def generate_purchase_order():
             return jsonify({'error': 'Invalid material'}), 400
         
         # Get recommendation
+        forecast_results = current_forecast_state()['results']
         if material not in forecast_results or forecast_results[material] is None:
             return jsonify({'error': 'Forecast not available'}), 503
         
-        recommendation = forecast_results[material]['recommendation']
+        recommendation = forecast_results[material].recommendation
+        snapshot = current_snapshot()
         
         # Get vendor data
-        if material not in vendor_data:
+        if material not in snapshot.vendor_data:
             return jsonify({'error': 'Vendor data not available'}), 404
         
         # Use best vendor (first in sorted list)
-        vendor = convert_to_json_serializable(vendor_data[material][0])
+        vendor = snapshot.vendor_data[material][0]
         
         # Get inventory data
-        if material not in inventory_data:
+        if material not in snapshot.inventory_data:
             return jsonify({'error': 'Inventory data not available'}), 404
         
-        inventory = convert_to_json_serializable(inventory_data[material])
+        inventory = snapshot.inventory_data[material]
         
         # Generate PO
         po_generator = get_po_generator()
@@ -640,30 +1327,30 @@ def get_vendor_risk_analysis(material):
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        try:
-            # Get vendor data
-            if material not in vendor_data:
-                return jsonify({'error': 'Vendor data not available'}), 404
-            
-            vendors = convert_to_json_serializable(vendor_data[material])
-            
-            # Calculate risk scores
-            analyzer = get_supply_chain_analyzer()
-            risk_analysis = []
-            
-            for vendor in vendors:
-                risk_data = analyzer.calculate_vendor_risk_score(vendor, material)
-                risk_analysis.append(risk_data)
-            
-            return jsonify({
-                'material': material,
-                'vendor_risk_analysis': risk_analysis,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    snapshot = current_snapshot()
+    try:
+        # Get vendor data
+        if material not in snapshot.vendor_data:
+            return jsonify({'error': 'Vendor data not available'}), 404
+        
+        vendors = snapshot.vendor_data[material]
+        
+        # Calculate risk scores
+        analyzer = get_supply_chain_analyzer()
+        risk_analysis = []
+        
+        for vendor in vendors:
+            risk_data = analyzer.calculate_vendor_risk_score(vendor, material)
+            risk_analysis.append(risk_data)
+        
+        return jsonify({
+            'material': material,
+            'vendor_risk_analysis': risk_analysis,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/supply-chain/alternatives/<material>', methods=['GET'])
 def get_alternative_materials(material):
@@ -709,31 +1396,30 @@ def get_lead_time_optimization(material):
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        try:
-            # Get vendor data
-            if material not in vendor_data:
-                return jsonify({'error': 'Vendor data not available'}), 404
-            
-            vendors = convert_to_json_serializable(vendor_data[material])
-            
-            # Get current price for context
-            material_df = price_data[price_data['material'] == material].iloc[-1]
-            current_price = float(material_df['price'])
-            
-            # Optimize lead times
-            analyzer = get_supply_chain_analyzer()
-            optimization = analyzer.optimize_lead_times(vendors, material)
-            
-            return jsonify({
-                'material': material,
-                'current_price': current_price,
-                'lead_time_optimization': optimization,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    snapshot = current_snapshot()
+    try:
+        # Get vendor data
+        if material not in snapshot.vendor_data:
+            return jsonify({'error': 'Vendor data not available'}), 404
+        
+        vendors = snapshot.vendor_data[material]
+        
+        # Get current price for context
+        current_price = snapshot.price_index.latest_price(material)
+        
+        # Optimize lead times
+        analyzer = get_supply_chain_analyzer()
+        optimization = analyzer.optimize_lead_times(vendors, material)
+        
+        return jsonify({
+            'material': material,
+            'current_price': current_price,
+            'lead_time_optimization': optimization,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/supply-chain/insights/<material>', methods=['GET'])
 def get_supply_chain_insights(material):
@@ -741,26 +1427,25 @@ def get_supply_chain_insights(material):
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        try:
-            # Get vendor data
-            if material not in vendor_data:
-                return jsonify({'error': 'Vendor data not available'}), 404
-            
-            vendors = convert_to_json_serializable(vendor_data[material])
-            
-            # Get current price
-            material_df = price_data[price_data['material'] == material].iloc[-1]
-            current_price = float(material_df['price'])
-            
-            # Get comprehensive insights
-            analyzer = get_supply_chain_analyzer()
-            insights = analyzer.get_supply_chain_insights(material, current_price, vendors)
-            
-            return jsonify(insights)
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    snapshot = current_snapshot()
+    try:
+        # Get vendor data
+        if material not in snapshot.vendor_data:
+            return jsonify({'error': 'Vendor data not available'}), 404
+        
+        vendors = snapshot.vendor_data[material]
+        
+        # Get current price
+        current_price = snapshot.price_index.latest_price(material)
+        
+        # Get comprehensive insights
+        analyzer = get_supply_chain_analyzer()
+        insights = analyzer.get_supply_chain_insights(material, current_price, vendors)
+        
+        return jsonify(insights)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/usp/opportunity-score/<material>', methods=['GET'])
 def get_opportunity_score(material):
@@ -768,36 +1453,36 @@ def get_opportunity_score(material):
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
 
-    with data_lock:
-        try:
-            # 1. Get price forecast data
-            price_forecast = forecast_results.get(material, {})
-
-            # 2. Get inventory data
-            material_inventory = inventory_data.get(material, {})
-
-            # 3. Get vendor data
-            material_vendors = vendor_data.get(material, [])
-
-            # 4. Get supply chain insights
-            supply_chain_analyzer = get_supply_chain_analyzer()
-            current_price = price_data[price_data['material'] == material]['price'].iloc[-1]
-            supply_chain_insights = supply_chain_analyzer.get_supply_chain_insights(material, float(current_price), material_vendors)
-
-            # 5. Calculate opportunity score
-            usp_analyzer = get_usp_analyzer()
-            opportunity_score = usp_analyzer.calculate_opportunity_score(
-                material,
-                price_forecast,
-                inventory_data, # Passing full inventory data
-                material_vendors,
-                supply_chain_insights
-            )
+    snapshot = current_snapshot()
+    try:
+        # 1. Get price forecast data
+        price_forecast = current_forecast_state()['results'].get(material) or {}
 
-            return jsonify(opportunity_score)
+        # 2. Get inventory data
+        material_inventory = snapshot.inventory_data.get(material, {})
 
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        # 3. Get vendor data
+        material_vendors = snapshot.vendor_data.get(material, [])
+
+        # 4. Get supply chain insights
+        supply_chain_analyzer = get_supply_chain_analyzer()
+        current_price = snapshot.price_index.latest_price(material)
+        supply_chain_insights = supply_chain_analyzer.get_supply_chain_insights(material, current_price, material_vendors)
+
+        # 5. Calculate opportunity score
+        usp_analyzer = get_usp_analyzer()
+        opportunity_score = usp_analyzer.calculate_opportunity_score(
+            material,
+            price_forecast,
+            snapshot.inventory_data, # Passing full inventory data
+            material_vendors,
+            supply_chain_insights
+        )
+
+        return jsonify(opportunity_score)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 # Preferred Supplier Analytics Endpoints
@@ -808,63 +1493,64 @@ def get_preferred_supplier_analysis(material):
     if material not in config.MATERIALS:
         return jsonify({'error': 'Material not found'}), 404
     
-    with data_lock:
-        try:
-            # Update the analyzer with current data
-            current_analyzer = PreferredSupplierAnalyzer(price_data, vendor_data)
-            
-            # Get comparison for the specific material
-            comparison = current_analyzer.compare_prices(material)
-            
-            return jsonify(comparison)
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    snapshot = current_snapshot()
+    try:
+        # Update the analyzer with current data
+        current_analyzer = PreferredSupplierAnalyzer(snapshot.price_data, snapshot.vendor_data)
+        
+        # Get comparison for the specific material
+        comparison = current_analyzer.compare_prices(material)
+        
+        return jsonify(comparison)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/preferred-supplier', methods=['GET'])
 def get_all_preferred_supplier_analysis():
     """Get preferred supplier analysis for all materials"""
-    with data_lock:
-        try:
-            # Update the analyzer with current data
-            current_analyzer = PreferredSupplierAnalyzer(price_data, vendor_data)
-            
-            # Get comparison for all materials
-            comparisons = current_analyzer.get_all_materials_comparison()
-            
-            return jsonify({
-                'preferred_supplier_analysis': comparisons,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    snapshot = current_snapshot()
+    try:
+        # Update the analyzer with current data
+        current_analyzer = PreferredSupplierAnalyzer(snapshot.price_data, snapshot.vendor_data)
+        
+        # Get comparison for all materials
+        comparisons = current_analyzer.get_all_materials_comparison()
+        
+        return jsonify({
+            'preferred_supplier_analysis': comparisons,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/preferred-supplier/negotiations', methods=['GET'])
 def get_negotiation_recommendations():
     """Get materials where negotiation with preferred supplier is recommended"""
-    with data_lock:
-        try:
-            # Update the analyzer with current data
-            current_analyzer = PreferredSupplierAnalyzer(price_data, vendor_data)
-            
-            # Get materials where negotiation is recommended
-            recommendations = current_analyzer.get_negotiation_recommendations()
-            
-            return jsonify({
-                'negotiation_recommendations': recommendations,
-                'count': len(recommendations),
-                'timestamp': datetime.now().isoformat()
-            })
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    snapshot = current_snapshot()
+    try:
+        # Update the analyzer with current data
+        current_analyzer = PreferredSupplierAnalyzer(snapshot.price_data, snapshot.vendor_data)
+        
+        # Get materials where negotiation is recommended
+        recommendations = current_analyzer.get_negotiation_recommendations()
+        
+        return jsonify({
+            'negotiation_recommendations': recommendations,
+            'count': len(recommendations),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 def initialize_app():
     """Initialize application components"""
-    global forecast_model, notification_manager, price_scraper, preferred_supplier_analyzer
+    global forecast_model, online_forecaster, drift_monitor, notification_manager, price_scraper, preferred_supplier_analyzer
+    global forecast_state, forecast_version, sqlite_store
     
     print("[Initializing Smart Procurement System...]")
     
@@ -879,34 +1565,62 @@ def initialize_app():
         print(f"[OK] Real-time price scraper initialized (API key: {'configured' if api_key else 'not set'})")
     
     # Load data
+    if config.STORAGE_BACKEND == 'sqlite':
+        sqlite_store = SQLiteStore(config.DATABASE_PATH)
+        print(f"[OK] SQLite store opened ({config.DATABASE_PATH}, WAL mode)")
     load_data()
+    snapshot = state_store.snapshot()
+    atexit.register(price_log.close)
     print("[OK] Data loaded")
     
     # Initialize forecast model
     forecast_model = PriceForecastModel()
     print("[OK] Forecast model initialized")
     
+    # Seed the online forecaster from history; scrapes update it tick by tick
+    online_forecaster = OnlineForecaster()
+    online_forecaster.seed(snapshot.price_data, config.MATERIALS)
+    print("[OK] Online forecaster initialized")
+    
+    # Drift monitor decides which materials need a refit
+    drift_monitor = DriftMonitor(
+        error_threshold=config.DRIFT_ERROR_THRESHOLD,
+        volatility_threshold=config.DRIFT_VOLATILITY_THRESHOLD,
+        max_staleness=config.FORECAST_MAX_STALENESS
+    )
+    
     # Initialize notification manager
     notification_manager = NotificationManager()
+    notification_manager.add_listener(lambda alert: event_broker.publish('alert', alert))
     print("[OK] Notification manager initialized")
     
     # Initialize preferred supplier analyzer
-    preferred_supplier_analyzer = PreferredSupplierAnalyzer(price_data, vendor_data)
+    preferred_supplier_analyzer = PreferredSupplierAnalyzer(snapshot.price_data, snapshot.vendor_data)
     print("[OK] Preferred supplier analyzer initialized")
     
-    # Generate initial forecasts
-    update_forecasts()
-    print("[OK] Initial forecasts generated")
+    # Serve cached forecasts immediately if available, otherwise train now
+    cached_results, cached_at = forecast_model.load_cache(config.FORECAST_CACHE)
+    if cached_results:
+        forecast_state = {'results': cached_results, 'last_update': cached_at}
+        forecast_version += 1
+        print(f"[OK] Loaded {len(cached_results)} cached forecasts (refreshing in background)")
+    else:
+        update_forecasts()
+        print("[OK] Initial forecasts generated")
     
     # Setup scheduler for periodic updates
     scheduler = BackgroundScheduler()
     
-    # Update forecasts every hour
+    # Refresh cached forecasts right away in the background
+    if cached_results:
+        scheduler.add_job(update_forecasts, 'date', run_date=datetime.now(), id='refresh_cached_forecasts')
+    
+    # Retrain materials whose prices drift from their forecast (or that went stale)
     scheduler.add_job(
-        update_forecasts,
+        check_forecast_drift,
         'interval',
-        seconds=config.FORECAST_UPDATE_INTERVAL,
-        id='update_forecasts'
+        seconds=config.DRIFT_CHECK_INTERVAL,
+        id='check_forecast_drift'
     )
     
     # Scrape real-time prices or simulate updates
@@ -923,7 +1637,7 @@ def initialize_app():
     
     print(f"\n[Smart Procurement System ready!]")
     print(f"[Tracking {len(config.MATERIALS)} materials: {', '.join(config.MATERIALS)}]")
-    print(f"[Forecast updates: every {config.FORECAST_UPDATE_INTERVAL}s]")
+    print(f"[Forecast drift checks: every {config.DRIFT_CHECK_INTERVAL}s, max staleness {config.FORECAST_MAX_STALENESS}s]")
     if config.ENABLE_REAL_TIME_SCRAPING:
         print(f"[Real-time price scraping: every {config.SCRAPING_INTERVAL}s]")
     else:
@@ -10,6 +10,14 @@ load_dotenv()
 FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
 FLASK_DEBUG = True
 
+# Batch API Configuration
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 8))  # Threads serving /api/batch sub-requests
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 50))  # Sub-requests allowed per batch
+
+# Event Stream Configuration
+STREAM_HEARTBEAT_INTERVAL = int(os.getenv('STREAM_HEARTBEAT_INTERVAL', 15))  # Seconds between keep-alive comments
+STREAM_BUFFER_SIZE = int(os.getenv('STREAM_BUFFER_SIZE', 256))  # Recent events kept for resuming clients
+
 # Streamlit Configuration
 STREAMLIT_PORT = int(os.getenv('STREAMLIT_PORT', 8501))
 
@@ -41,17 +49,36 @@ MATERIAL_PRICES_CSV = os.path.join(DATA_DIR, 'material_prices.csv')
 INVENTORY_JSON = os.path.join(DATA_DIR, 'inventory.json')
 VENDORS_JSON = os.path.join(DATA_DIR, 'vendors.json')
 FORECAST_CACHE = os.path.join(DATA_DIR, 'forecast_cache.json')
+PRICE_LOG_CSV = os.path.join(DATA_DIR, 'material_prices_log.csv')  # Rows appended since the last compaction
+PRICE_COLUMNS_DIR = os.path.join(DATA_DIR, 'price_columns')  # Memory-mapped columnar copy of material_prices.csv
+
+# Price Frame Configuration
+PRICE_FLOAT32 = os.getenv('PRICE_FLOAT32', 'false').lower() == 'true'  # float32 prices / int32 volumes in memory (about 7 significant digits)
+
+# Price Log Configuration
+PRICE_LOG_FSYNC_ROWS = int(os.getenv('PRICE_LOG_FSYNC_ROWS', 100))  # Unsynced rows that force an fsync
+PRICE_LOG_FSYNC_INTERVAL = float(os.getenv('PRICE_LOG_FSYNC_INTERVAL', 5))  # Seconds between fsyncs of appended rows
+PRICE_LOG_COMPACT_ROWS = int(os.getenv('PRICE_LOG_COMPACT_ROWS', 5000))  # Log rows that trigger a snapshot rewrite
 
 # Database
 DATABASE_PATH = os.path.join(DATA_DIR, 'procurement.db')
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'files')  # 'files' (CSV/JSON) or 'sqlite' (DATABASE_PATH, shareable across processes)
+STORAGE_REFRESH_INTERVAL = float(os.getenv('STORAGE_REFRESH_INTERVAL', 1))  # Seconds between checks for other processes' writes
 
 # Forecasting Configuration
 FORECAST_DAYS = 7
 HISTORICAL_DAYS = 30
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', 1))  # Processes used to fit Prophet models
+FORECAST_ENGINE = os.getenv('FORECAST_ENGINE', 'prophet')  # 'prophet' or 'linear' (batched trend fallback)
 
 # Update Intervals (in seconds)
 PRICE_UPDATE_INTERVAL = 300  # 5 minutes
-FORECAST_UPDATE_INTERVAL = 3600  # 1 hour
+
+# Adaptive Retraining Configuration
+DRIFT_CHECK_INTERVAL = int(os.getenv('DRIFT_CHECK_INTERVAL', 300))  # 5 minutes
+DRIFT_ERROR_THRESHOLD = float(os.getenv('DRIFT_ERROR_THRESHOLD', 2.0))  # Smoothed forecast error, percentage
+DRIFT_VOLATILITY_THRESHOLD = float(os.getenv('DRIFT_VOLATILITY_THRESHOLD', 2.0))  # Smoothed tick volatility, percentage
+FORECAST_MAX_STALENESS = int(os.getenv('FORECAST_MAX_STALENESS', 21600))  # 6 hours
 
 # Web Scraping Configuration
 ENABLE_REAL_TIME_SCRAPING = os.getenv('ENABLE_REAL_TIME_SCRAPING', 'true').lower() == 'true'
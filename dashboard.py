@@ -120,20 +120,108 @@ st.markdown("""
 # API Base URL
 API_BASE_URL = f"http://localhost:{config.FLASK_PORT}/api"
 
+# Points per price chart or history fetch; the backend downsamples longer ranges
+CHART_MAX_POINTS = 500
+
+# Seconds a live-updating page waits for a pushed event before rerunning. Streamlit
+# only handles navigation and widget changes between script runs, so this
+# bounds how long the page stays unresponsive
+LIVE_UPDATE_WAIT = 10
+
+# Price distribution bins; the backend counts every price, not the downsampled points
+HISTOGRAM_BINS = 20
+
 # Helper functions
+@st.cache_resource
+def get_etag_cache():
+    """Last ETag and body per endpoint, shared across reruns"""
+    return {}
+
 @st.cache_data(ttl=60)
 def fetch_data(endpoint):
     """Fetch data from API with caching"""
     try:
-        response = requests.get(f"{API_BASE_URL}/{endpoint}", timeout=5)
-        if response.status_code == 200:
-            return response.json()
+        # Revalidate with the last ETag; unchanged data comes back as a bodiless 304
+        etag_cache = get_etag_cache()
+        cached = etag_cache.get(endpoint)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        
+        response = requests.get(f"{API_BASE_URL}/{endpoint}", headers=headers, timeout=5)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        elif response.status_code == 200:
+            data = response.json()
+            if response.headers.get('ETag'):
+                etag_cache[endpoint] = (response.headers['ETag'], data)
+            return data
         else:
             return None
     except Exception as e:
         st.error(f"Error fetching data: {str(e)}")
         return None
 
+@st.cache_data(ttl=60)
+def fetch_batch(endpoints):
+    """
+    Fetch several endpoints in one request via /api/batch
+    
+    Args:
+        endpoints: Tuple of endpoint paths (hashable, for caching)
+    
+    Returns:
+        Dict of endpoint -> JSON body (None for failed sub-requests)
+    """
+    try:
+        response = requests.post(f"{API_BASE_URL}/batch", json={'paths': list(endpoints)}, timeout=10)
+        if response.status_code == 200:
+            return {
+                item['path']: item['body'] if item['status'] == 200 else None
+                for item in response.json()['responses']
+            }
+    except Exception:
+        pass
+    
+    # Older backends without /api/batch: fall back to one request per endpoint
+    return {endpoint: fetch_data(endpoint) for endpoint in endpoints}
+
+def wait_for_update(last_event_id=None, timeout=LIVE_UPDATE_WAIT):
+    """
+    Block until the backend pushes an event on /api/stream
+    
+    Waits at most about twice timeout: the deadline is checked as lines
+    arrive, and the read timeout covers a silent connection.
+    
+    Args:
+        last_event_id: Id of the last event seen; events missed since then
+            are replayed immediately
+        timeout: Seconds to wait before giving up
+    
+    Returns:
+        Id of the event received, or None on timeout or connection failure
+    """
+    params = {'last_event_id': last_event_id} if last_event_id else {}
+    deadline = time.time() + timeout
+    
+    try:
+        with requests.get(f"{API_BASE_URL}/stream", params=params, stream=True, timeout=(5, timeout)) as response:
+            event_id = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('id:'):
+                    event_id = line[3:].strip()
+                elif line == '' and event_id:
+                    return event_id
+                
+                if time.time() > deadline:
+                    return None
+    except requests.exceptions.ReadTimeout:
+        return None
+    except Exception:
+        # Stream unavailable; avoid reconnecting in a tight loop
+        time.sleep(min(5, timeout))
+        return None
+    
+    return None
+
 def get_recommendation_color(recommendation):
     """Get color for recommendation badge"""
     colors = {
@@ -143,17 +231,17 @@ def get_recommendation_color(recommendation):
     }
     return colors.get(recommendation, '#6c757d')
 
-def create_price_chart(material, historical_data, forecast_data=None):
-    """Create interactive price chart with forecast"""
+def create_price_chart(material, bars, forecast_data=None):
+    """Create interactive price chart (bar closes) with forecast"""
     fig = go.Figure()
     
-    # Historical prices
-    df = pd.DataFrame(historical_data)
-    df['date'] = pd.to_datetime(df['date'])
+    # Historical closes
+    df = pd.DataFrame(bars, columns=['time', 'open', 'high', 'low', 'close'])
+    df['date'] = pd.to_datetime(df['time'])
     
     fig.add_trace(go.Scatter(
         x=df['date'],
-        y=df['price'],
+        y=df['close'],
         mode='lines+markers',
         name='Historical Price',
         line=dict(color='#667eea', width=3),
@@ -186,6 +274,10 @@ def create_price_chart(material, historical_data, forecast_data=None):
             showlegend=True
         ))
     
+    xaxis = dict(tickformat='%m/%d', tickangle=-45)
+    if len(df) and df['date'].max() - df['date'].min() <= pd.Timedelta(days=31):
+        xaxis['dtick'] = 86400000.0  # 1 day in milliseconds; longer ranges use automatic ticks
+    
     fig.update_layout(
         title=f'{material} Price Trend & Forecast',
         xaxis_title='Date',
@@ -193,11 +285,7 @@ def create_price_chart(material, historical_data, forecast_data=None):
         hovermode='x unified',
         template='plotly_white',
         height=450,
-        xaxis=dict(
-            tickformat='%m/%d',
-            tickangle=-45,
-            dtick=86400000.0  # 1 day in milliseconds
-        )
+        xaxis=xaxis
     )
     
     return fig
@@ -264,11 +352,8 @@ def main():
         
         st.markdown("---")
         
-        # Auto-refresh
-        auto_refresh = st.checkbox("Auto-refresh (30s)", value=False)
-        if auto_refresh:
-            time.sleep(30)
-            st.rerun()
+        # Live updates are pushed by the backend; see the end of main()
+        live_updates = st.checkbox("Live updates", value=False)
         
         if st.button("🔄 Refresh Now"):
             st.cache_data.clear()
@@ -293,13 +378,24 @@ def main():
         show_supply_chain()
     elif page == "🎯 Opportunity Score":
         show_opportunity_score()
+    
+    # With the page rendered, wait briefly for the backend to push a change;
+    # rerunning after each short wait lets Streamlit act on user input
+    if live_updates:
+        event_id = wait_for_update(st.session_state.get('last_event_id'))
+        if event_id:
+            st.session_state['last_event_id'] = event_id
+            st.cache_data.clear()
+        st.rerun()
 
 def show_overview():
     """Overview dashboard page"""
     st.header("📊 Dashboard Overview")
     
-    # Fetch summary data
-    summary = fetch_data("dashboard/summary")
+    # Fetch the summary and every material's daily bars in one round trip
+    ohlc_endpoints = tuple(f"prices/ohlc/{material}?resolution=daily" for material in config.MATERIALS)
+    batch = fetch_batch(("dashboard/summary",) + ohlc_endpoints)
+    summary = batch.get("dashboard/summary")
     
     if not summary:
         st.error("Unable to fetch dashboard data. Please ensure the Flask backend is running.")
@@ -370,21 +466,17 @@ def show_overview():
     
     for idx, material in enumerate(config.MATERIALS):
         with chart_cols[idx]:
-            historical = fetch_data(f"prices/historical/{material}")
+            ohlc = batch.get(f"prices/ohlc/{material}?resolution=daily")
             
-            if historical:
-                df = pd.DataFrame(historical['history'])
-                df['date'] = pd.to_datetime(df['date'])
-                # Group by date (day only) and take the mean price for each day
-                df['date_day'] = df['date'].dt.date
-                df = df.groupby('date_day')['price'].mean().reset_index()
-                df['date'] = pd.to_datetime(df['date_day']) # Convert back to datetime for plotting
-                df = df.tail(7)
+            if ohlc:
+                # One bar per day, aggregated by the backend as ticks arrive
+                df = pd.DataFrame(ohlc['bars'], columns=['time', 'close']).tail(7)
+                df['date'] = pd.to_datetime(df['time'])
                 
                 # Format date for better display
                 df['date_str'] = df['date'].dt.strftime('%m/%d')
                 
-                fig = px.line(df, x='date_str', y='price', title=material, markers=True)
+                fig = px.line(df, x='date_str', y='close', title=material, markers=True)
                 fig.update_layout(
                     height=250, 
                     showlegend=False, 
@@ -419,21 +511,26 @@ def show_price_analysis():
     """Price analysis page"""
     st.header("💰 Price Analysis & Forecasting")
     
-    # Material selector
+    # Material and chart resolution selectors
     material = st.selectbox("Select Material", config.MATERIALS)
+    resolution = st.radio("Chart Resolution", ["daily", "hourly"], horizontal=True)
     
     # Fetch data
-    historical = fetch_data(f"prices/historical/{material}")
-    forecast = fetch_data(f"forecast/{material}")
-    
-    if not historical:
+    history_endpoint = f"prices/historical/{material}?max_points={CHART_MAX_POINTS}&bins={HISTOGRAM_BINS}"
+    ohlc_endpoint = f"prices/ohlc/{material}?resolution={resolution}&max_points={CHART_MAX_POINTS}"
+    batch = fetch_batch((history_endpoint, ohlc_endpoint, f"forecast/{material}"))
+    historical = batch.get(history_endpoint)
+    ohlc = batch.get(ohlc_endpoint)
+    forecast = batch.get(f"forecast/{material}")
+    
+    if not historical or not ohlc:
         st.error("Unable to fetch price data")
         return
     
     # Price chart with forecast
     st.subheader(f"{material} Price Analysis")
     
-    fig = create_price_chart(material, historical['history'], forecast)
+    fig = create_price_chart(material, ohlc['bars'], forecast)
     st.plotly_chart(fig, use_container_width=True)
     
     # Recommendation details
@@ -477,24 +574,42 @@ def show_price_analysis():
     
     df = pd.DataFrame(historical['history'])
     
+    # The history may be downsampled; the backend's summary covers every point
+    summary = historical.get('summary') or {
+        'mean': df['price'].mean(), 'max': df['price'].max(),
+        'min': df['price'].min(), 'std': df['price'].std()
+    }
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Average Price", f"${df['price'].mean():.2f}")
+        st.metric("Average Price", f"${summary['mean']:.2f}")
     
     with col2:
-        st.metric("Highest Price", f"${df['price'].max():.2f}")
+        st.metric("Highest Price", f"${summary['max']:.2f}")
     
     with col3:
-        st.metric("Lowest Price", f"${df['price'].min():.2f}")
+        st.metric("Lowest Price", f"${summary['min']:.2f}")
     
     with col4:
-        volatility = df['price'].std()
+        volatility = summary['std']
         st.metric("Volatility (σ)", f"${volatility:.2f}")
     
     # Price distribution
     st.subheader("📊 Price Distribution")
-    fig = px.histogram(df, x='price', nbins=20, title=f"{material} Price Distribution", color_discrete_sequence=['#667eea'])
+    histogram = historical.get('histogram')
+    if histogram:
+        edges = histogram['edges']
+        fig = go.Figure(go.Bar(
+            x=[(low + high) / 2 for low, high in zip(edges[:-1], edges[1:])],
+            y=histogram['counts'],
+            width=[high - low for low, high in zip(edges[:-1], edges[1:])],
+            marker_color='#667eea'
+        ))
+        fig.update_layout(title=f"{material} Price Distribution", xaxis_title='price', yaxis_title='count')
+    else:
+        # Older backends without histograms: bin the returned points
+        fig = px.histogram(df, x='price', nbins=HISTOGRAM_BINS, title=f"{material} Price Distribution", color_discrete_sequence=['#667eea'])
     fig.update_layout(height=350, showlegend=False)
     st.plotly_chart(fig, use_container_width=True)
 
@@ -683,10 +798,10 @@ def show_vendors():
     # Material selector
     material = st.selectbox("Select Material", config.MATERIALS, key="vendor_material")
     
-    # Fetch vendor data
-    vendors_data = fetch_data(f"vendors/{material}")
-    # Fetch preferred supplier analysis
-    preferred_analysis = fetch_data(f"preferred-supplier/{material}")
+    # Fetch vendor data and preferred supplier analysis in one round trip
+    batch = fetch_batch((f"vendors/{material}", f"preferred-supplier/{material}"))
+    vendors_data = batch.get(f"vendors/{material}")
+    preferred_analysis = batch.get(f"preferred-supplier/{material}")
     
     if not vendors_data:
         st.error("Unable to fetch vendor data")
@@ -0,0 +1,190 @@
+"""
+Rolling-origin backtesting for the price forecasters
+
+Replays a material_prices.csv-style history: at every origin day the models
+are fitted on the days before it and scored on the days that follow, which
+measures both forecast accuracy and how often the BUY NOW/WAIT/MONITOR call
+matches the decision the realized prices would have produced.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from models.forecast_model import PriceForecastModel, Prophet, simple_linear_forecast, build_recommendation
+
+# Imported up front so the first linear fold's latency excludes the import
+from sklearn.linear_model import LinearRegression  # noqa: F401
+
+MODELS = ('prophet', 'linear')
+
+def daily_closes(df, material):
+    """
+    Get one closing price per day for a material, in date order
+    """
+    material_df = df[df['material'] == material][['date', 'price']].copy()
+    material_df['ds'] = pd.to_datetime(material_df['date']).dt.normalize()
+    material_df = material_df.sort_values('ds', kind='stable')
+    closes = material_df.groupby('ds', sort=True)['price'].last()
+    return pd.DataFrame({'ds': closes.index, 'y': closes.values})
+
+def rolling_origins(n_days, initial_days, horizon, step):
+    """
+    Get origin indices for rolling-origin evaluation
+    
+    Each origin trains on days [0, origin) and tests on [origin, origin + horizon).
+    """
+    return list(range(initial_days, n_days - horizon + 1, step))
+
+def _fit_predict(model_name, train_df, material, horizon):
+    """
+    Fit one model and forecast the horizon
+    
+    Returns:
+        Tuple of (forecast DataFrame, fit seconds, predict seconds)
+    """
+    if model_name == 'prophet':
+        model = PriceForecastModel()
+        
+        start = time.perf_counter()
+        model.train_model(train_df, material)
+        fitted = time.perf_counter()
+        forecast = model.forecast(material, periods=horizon)
+        predicted = time.perf_counter()
+        
+        return forecast, fitted - start, predicted - fitted
+    
+    if model_name == 'linear':
+        # simple_linear_forecast fits and predicts in one call
+        start = time.perf_counter()
+        forecast = simple_linear_forecast(train_df, material, periods=horizon)
+        return forecast, time.perf_counter() - start, 0.0
+    
+    raise ValueError(f"Unknown model: {model_name}")
+
+def run_fold(material, history, origin, horizon, models=MODELS):
+    """
+    Fit every model on one fold and score it against the realized prices
+    
+    Args:
+        material: Material name
+        history: Daily ds/y closes from daily_closes
+        origin: Index of the first test day
+        horizon: Number of test days
+        models: Model names to evaluate
+    
+    Returns:
+        List of result dicts, one per model
+    """
+    train = history.iloc[:origin]
+    test = history.iloc[origin:origin + horizon]
+    train_df = pd.DataFrame({'date': train['ds'].values, 'material': material, 'price': train['y'].values})
+    
+    current_price = float(train['y'].iloc[-1])
+    actual = test.set_index('ds')['y']
+    actual_call = build_recommendation(material, current_price, actual.values)['recommendation']
+    
+    rows = []
+    for model_name in models:
+        row = {
+            'material': material,
+            'model': model_name,
+            'origin': train['ds'].iloc[-1],
+            'train_days': len(train),
+            'actual_recommendation': actual_call
+        }
+        
+        try:
+            forecast, fit_seconds, predict_seconds = _fit_predict(model_name, train_df, material, horizon)
+            
+            # Score only days that have a realized price
+            predicted = forecast.set_index('ds')['yhat'].reindex(actual.index)
+            scored = predicted.notna()
+            errors = np.abs(actual[scored].values - predicted[scored].values) / np.abs(actual[scored].values)
+            
+            predicted_call = build_recommendation(
+                material, current_price, forecast['yhat'].values[:horizon]
+            )['recommendation']
+            
+            row.update({
+                'mape': float(np.mean(errors) * 100) if scored.any() else np.nan,
+                'predicted_recommendation': predicted_call,
+                'hit': predicted_call == actual_call,
+                'fit_seconds': fit_seconds,
+                'predict_seconds': predict_seconds,
+                'error': None
+            })
+        except Exception as e:
+            row.update({
+                'mape': np.nan,
+                'predicted_recommendation': None,
+                'hit': np.nan,
+                'fit_seconds': np.nan,
+                'predict_seconds': np.nan,
+                'error': str(e)
+            })
+        
+        rows.append(row)
+    
+    return rows
+
+def backtest(df, materials, initial_days=21, horizon=7, step=1, models=MODELS, n_workers=1):
+    """
+    Run rolling-origin backtests for all materials
+    
+    Folds are independent, so with n_workers > 1 they are spread across a
+    process pool. Results are returned in (material, origin) order.
+    
+    Returns:
+        DataFrame with one row per (material, model, origin)
+    """
+    if Prophet is None:
+        models = tuple(m for m in models if m != 'prophet')
+    
+    tasks = []
+    for material in materials:
+        history = daily_closes(df, material)
+        for origin in rolling_origins(len(history), initial_days, horizon, step):
+            tasks.append((material, history, origin, horizon, models))
+    
+    if n_workers and n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+            futures = [executor.submit(run_fold, *task) for task in tasks]
+            fold_rows = [future.result() for future in futures]
+    else:
+        fold_rows = [run_fold(*task) for task in tasks]
+    
+    return pd.DataFrame([row for rows in fold_rows for row in rows])
+
+def summarize(results):
+    """
+    Aggregate fold results into per-material, per-model accuracy and latency
+    """
+    if results.empty:
+        return results
+    
+    results = results.assign(hit=results['hit'].astype(float))
+    summary = results.groupby(['material', 'model']).agg(
+        folds=('origin', 'count'),
+        failed_folds=('error', lambda errors: int(errors.notna().sum())),
+        mape=('mape', 'mean'),
+        hit_rate=('hit', 'mean'),
+        fit_seconds=('fit_seconds', 'mean'),
+        predict_seconds=('predict_seconds', 'mean')
+    ).reset_index()
+    summary['hit_rate'] = summary['hit_rate'] * 100
+    
+    return summary.round({'mape': 2, 'hit_rate': 1, 'fit_seconds': 4, 'predict_seconds': 4})
+
+if __name__ == '__main__':
+    # Backtest the configured materials on the stored price history
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+    from utils.price_log import PriceLog
+    
+    df = PriceLog(config.MATERIAL_PRICES_CSV, config.PRICE_LOG_CSV).load()
+    results = backtest(df, config.MATERIALS, n_workers=config.FORECAST_WORKERS)
+    
+    print(summarize(results).to_string(index=False))
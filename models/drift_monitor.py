@@ -0,0 +1,139 @@
+"""
+Drift monitoring for adaptive forecast retraining
+"""
+import math
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+class DriftMonitor:
+    """
+    Tracks how far scraped prices drift from each material's forecast
+
+    For every tick the monitor updates an exponentially weighted mean of the
+    absolute percentage error against the published forecast and an
+    exponentially weighted volatility of tick-to-tick returns. A material is
+    due for retraining when its error crosses the threshold, when its
+    volatility is above the threshold and higher than when the model was
+    fit, or when its model is older than the maximum staleness bound.
+    """
+
+    def __init__(self, error_threshold=2.0, volatility_threshold=2.0, max_staleness=21600, smoothing=0.3):
+        """
+        Args:
+            error_threshold: Smoothed forecast error (%) that triggers a refit
+            volatility_threshold: Smoothed tick return volatility (%) that triggers a refit
+            max_staleness: Seconds after which a model is refit regardless of drift
+            smoothing: Weight of the newest tick in the moving averages
+        """
+        self.error_threshold = error_threshold
+        self.volatility_threshold = volatility_threshold
+        self.max_staleness = max_staleness
+        self.smoothing = smoothing
+        self.states = {}
+        self._lock = threading.Lock()
+
+    def _state(self, material):
+        if material not in self.states:
+            self.states[material] = {
+                'error': 0.0,
+                'variance': 0.0,
+                'trained_variance': 0.0,
+                'last_price': None,
+                'last_trained': None,
+                'observations': 0
+            }
+        return self.states[material]
+
+    def observe(self, material, price, forecast=None, timestamp=None):
+        """
+        Record a scraped price against the material's current forecast
+
+        Args:
+            material: Material name
+            price: Latest scraped price
+            forecast: ForecastRecord currently published for the material
+            timestamp: Tick time (defaults to now)
+        """
+        timestamp = pd.Timestamp(timestamp if timestamp is not None else datetime.now())
+        price = float(price)
+        alpha = self.smoothing
+
+        with self._lock:
+            state = self._state(material)
+
+            if forecast is not None and len(forecast) > 0:
+                expected = self._expected_price(forecast, timestamp)
+                if expected > 0:
+                    error_pct = abs(price - expected) / expected * 100
+                    state['error'] = (1 - alpha) * state['error'] + alpha * error_pct
+
+            if state['last_price']:
+                return_pct = (price - state['last_price']) / state['last_price'] * 100
+                state['variance'] = (1 - alpha) * state['variance'] + alpha * return_pct ** 2
+
+            state['last_price'] = price
+            state['observations'] += 1
+
+    def _expected_price(self, forecast, timestamp):
+        """Interpolate the forecast at the tick time (clamped to the horizon)"""
+        times = forecast.ds.astype('datetime64[ns]').astype(np.int64)
+        return float(np.interp(timestamp.value, times, forecast.yhat))
+
+    def mark_trained(self, materials, timestamp=None):
+        """
+        Reset drift for materials that were just refit
+
+        The volatility is not reset, since it describes the market rather
+        than the model; it is recorded so that only a further rise triggers
+        another refit.
+        """
+        timestamp = timestamp or datetime.now()
+        with self._lock:
+            for material in materials:
+                state = self._state(material)
+                state['error'] = 0.0
+                state['trained_variance'] = state['variance']
+                state['last_trained'] = timestamp
+
+    def due_materials(self, materials, now=None):
+        """
+        Get materials that need a refit
+
+        Returns:
+            Dict of material -> reason ('untrained', 'drift', 'volatility' or 'stale'),
+            in the order materials were given
+        """
+        now = now or datetime.now()
+        due = {}
+
+        with self._lock:
+            for material in materials:
+                state = self._state(material)
+
+                if state['last_trained'] is None:
+                    due[material] = 'untrained'
+                elif state['error'] >= self.error_threshold:
+                    due[material] = 'drift'
+                elif (math.sqrt(state['variance']) >= self.volatility_threshold
+                      and state['variance'] > state['trained_variance']):
+                    due[material] = 'volatility'
+                elif (now - state['last_trained']).total_seconds() >= self.max_staleness:
+                    due[material] = 'stale'
+
+        return due
+
+    def get_status(self):
+        """Get per-material drift metrics"""
+        with self._lock:
+            return {
+                material: {
+                    'error_pct': round(state['error'], 3),
+                    'volatility_pct': round(math.sqrt(state['variance']), 3),
+                    'trained_volatility_pct': round(math.sqrt(state['trained_variance']), 3),
+                    'last_trained': state['last_trained'].isoformat() if state['last_trained'] else None,
+                    'observations': state['observations']
+                }
+                for material, state in self.states.items()
+            }
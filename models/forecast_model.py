@@ -3,10 +3,210 @@ Price forecasting model using Facebook Prophet
 """
 import pandas as pd
 import numpy as np
-from prophet import Prophet
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import hashlib
+import json
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Add the project root to the path to import utils when run directly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.price_index import PriceIndex
+from utils.serialization import encode_json
+
+# Prophet is optional: without it forecasts use the vectorized linear fallback
+try:
+    from prophet import Prophet
+    from prophet.serialize import model_to_json, model_from_json
+except ImportError:
+    Prophet = None
+
+# Columns kept for stored forecasts; other Prophet components are dropped
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+# Bump when the on-disk layout written by save_cache changes
+CACHE_FORMAT_VERSION = 2
+
+# Prophet hyperparameters shared by serial and parallel training
+PROPHET_PARAMS = {
+    'daily_seasonality': False,
+    'weekly_seasonality': True,
+    'yearly_seasonality': False,
+    'changepoint_prior_scale': 0.05,
+    'interval_width': 0.95
+}
+
+def _fit_and_forecast(material, train_data, periods):
+    """
+    Process pool worker: fit a Prophet model for one material and forecast it.
+    Errors are returned instead of raised so one material cannot fail the batch.
+    """
+    warnings.filterwarnings('ignore')
+    try:
+        model = Prophet(**PROPHET_PARAMS)
+        model.fit(train_data)
+        future = model.make_future_dataframe(periods=periods, include_history=False)
+        forecast = model.predict(future)[FORECAST_COLUMNS]
+        return material, model, forecast, None
+    except Exception as e:
+        return material, None, None, str(e)
+
+def build_recommendation(material, current_price, future_prices):
+    """
+    Buy/wait decision rule shared by every forecaster
+
+    Args:
+        material: Material name
+        current_price: Latest observed price
+        future_prices: Forecasted prices for the next days, in order
+    """
+    avg_future_price = np.mean(future_prices)
+    min_future_price = np.min(future_prices)
+    max_future_price = np.max(future_prices)
+    
+    # Calculate price change percentage
+    price_change_pct = ((avg_future_price - current_price) / current_price) * 100
+    
+    # Calculate potential savings/loss
+    potential_savings = current_price - min_future_price
+    potential_loss = max_future_price - current_price
+    
+    # More sensitive decision logic (reduced threshold from 2% to 1%)
+    if price_change_pct > 1.0:
+        recommendation = "BUY NOW"
+        reason = f"Price expected to rise by {price_change_pct:.1f}% in next 7 days"
+        confidence = "High" if price_change_pct > 2 else "Medium"
+    elif price_change_pct < -1.0:
+        recommendation = "WAIT"
+        reason = f"Price expected to drop by {abs(price_change_pct):.1f}% in next 7 days"
+        confidence = "High" if price_change_pct < -2 else "Medium"
+    else:
+        # Even for stable prices, give actionable advice
+        if potential_savings > potential_loss:
+            recommendation = "WAIT"
+            reason = f"Price may drop to ${min_future_price:.2f}/ton. Wait for better opportunity"
+            confidence = "Medium"
+        elif potential_loss > potential_savings * 1.5:
+            recommendation = "BUY NOW"
+            reason = f"Price may rise to ${max_future_price:.2f}/ton. Buy before increase"
+            confidence = "Medium"
+        else:
+            recommendation = "MONITOR"
+            reason = "Price expected to remain stable. Monitor for changes"
+            confidence = "Medium"
+    
+    # Find best day to buy in next 7 days
+    best_day_idx = np.argmin(future_prices)
+    
+    return {
+        'material': material,
+        'current_price': round(current_price, 2),
+        'avg_forecast_price': round(avg_future_price, 2),
+        'min_forecast_price': round(min_future_price, 2),
+        'price_change_pct': round(price_change_pct, 2),
+        'recommendation': recommendation,
+        'reason': reason,
+        'confidence': confidence,
+        'best_day_to_buy': best_day_idx + 1,
+        'potential_savings': round(max(0, potential_savings), 2)
+    }
+
+class ForecastRecord:
+    """
+    Compact forecast result: horizon dates, yhat, bounds and recommendation
+
+    Replaces the full Prophet output frame in forecast results. Supports
+    result['recommendation'] and result.get('recommendation') so code written
+    against the old result dicts keeps working.
+    """
+    __slots__ = ('material', 'ds', 'yhat', 'yhat_lower', 'yhat_upper', 'recommendation')
+    
+    def __init__(self, material, ds, yhat, yhat_lower, yhat_upper, recommendation=None):
+        self.material = material
+        self.ds = np.asarray(ds, dtype='datetime64[ns]')
+        self.yhat = np.asarray(yhat, dtype=np.float64)
+        self.yhat_lower = np.asarray(yhat_lower, dtype=np.float64)
+        self.yhat_upper = np.asarray(yhat_upper, dtype=np.float64)
+        self.recommendation = recommendation
+    
+    @classmethod
+    def from_frame(cls, material, forecast_df, recommendation=None):
+        """Build a record from a DataFrame with ds/yhat/yhat_lower/yhat_upper columns"""
+        return cls(
+            material,
+            forecast_df['ds'].values,
+            forecast_df['yhat'].values,
+            forecast_df['yhat_lower'].values,
+            forecast_df['yhat_upper'].values,
+            recommendation
+        )
+    
+    def __len__(self):
+        return len(self.ds)
+    
+    def __getitem__(self, key):
+        if key == 'forecast':
+            return self.to_frame()
+        if key in ('recommendation', 'material'):
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+    
+    def to_frame(self):
+        """Get the forecast as a ds/yhat/yhat_lower/yhat_upper DataFrame"""
+        return pd.DataFrame({
+            'ds': self.ds,
+            'yhat': self.yhat,
+            'yhat_lower': self.yhat_lower,
+            'yhat_upper': self.yhat_upper
+        })
+    
+    def to_records(self, periods=None):
+        """
+        Get the last `periods` rows (all rows by default) as JSON-ready dicts
+        """
+        rows = slice(-periods, None) if periods else slice(None)
+        dates = np.datetime_as_string(self.ds[rows], unit='D').tolist()
+        predicted = np.round(self.yhat[rows], 2).tolist()
+        lower = np.round(self.yhat_lower[rows], 2).tolist()
+        upper = np.round(self.yhat_upper[rows], 2).tolist()
+        
+        return [
+            {'date': date, 'predicted_price': price, 'lower_bound': low, 'upper_bound': high}
+            for date, price, low, high in zip(dates, predicted, lower, upper)
+        ]
+    
+    def to_dict(self):
+        """Serialize for the forecast cache"""
+        return {
+            'ds': np.datetime_as_string(self.ds, unit='s').tolist(),
+            'yhat': self.yhat.tolist(),
+            'yhat_lower': self.yhat_lower.tolist(),
+            'yhat_upper': self.yhat_upper.tolist(),
+            'recommendation': self.recommendation
+        }
+    
+    @classmethod
+    def from_dict(cls, material, data):
+        """Restore a record written by to_dict"""
+        return cls(
+            material,
+            np.array(data['ds'], dtype='datetime64[ns]'),
+            data['yhat'],
+            data['yhat_lower'],
+            data['yhat_upper'],
+            data.get('recommendation')
+        )
+
 class PriceForecastModel:
     """
     Forecasting model for material prices
@@ -15,11 +215,27 @@ class PriceForecastModel:
     def __init__(self):
         self.models = {}
         self.forecasts = {}
+        
+        # Fit cache: material -> fingerprint of the series the model was fitted on
+        self._fit_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
     
-    def prepare_data(self, df, material):
+    def prepare_data(self, df, material, price_index=None):
         """
         Prepare data for Prophet model
+        
+        Args:
+            df: Price history DataFrame
+            material: Material name
+            price_index: Optional PriceIndex over df; avoids filtering df
         """
+        if price_index is not None:
+            return pd.DataFrame({
+                'ds': price_index.dates_for(material),
+                'y': price_index.prices_for(material)
+            })
+        
         material_df = df[df['material'] == material].copy()
         material_df = material_df.rename(columns={'date': 'ds', 'price': 'y'})
         material_df['ds'] = pd.to_datetime(material_df['ds'])
@@ -34,22 +250,20 @@ class PriceForecastModel:
         train_data = self.prepare_data(df, material)
         
         # Initialize and train model
-        model = Prophet(
-            daily_seasonality=False,
-            weekly_seasonality=True,
-            yearly_seasonality=False,
-            changepoint_prior_scale=0.05,
-            interval_width=0.95
-        )
+        model = Prophet(**PROPHET_PARAMS)
         
         model.fit(train_data)
         self.models[material] = model
         
         return model
     
-    def forecast(self, material, periods=7):
+    def forecast(self, material, periods=7, include_history=False):
         """
         Generate forecast for specified periods
+
+        By default only the horizon rows are predicted and the result keeps
+        just ds/yhat/yhat_lower/yhat_upper. Pass include_history=True to get
+        the full Prophet output (all components) for the in-sample fit too.
         """
         if material not in self.models:
             raise ValueError(f"Model for {material} not trained yet")
@@ -57,105 +271,274 @@ class PriceForecastModel:
         model = self.models[material]
         
         # Create future dataframe
-        future = model.make_future_dataframe(periods=periods)
+        future = model.make_future_dataframe(periods=periods, include_history=include_history)
         
         # Generate forecast
         forecast = model.predict(future)
         
-        # Store forecast
-        self.forecasts[material] = forecast
+        # Store compact horizon rows only
+        self.forecasts[material] = forecast.tail(periods)[FORECAST_COLUMNS].reset_index(drop=True)
         
-        return forecast
+        return forecast if include_history else self.forecasts[material]
     
-    def get_recommendation(self, df, material, forecast_df):
+    def get_recommendation(self, df, material, forecast_df, price_index=None):
         """
         Generate buy/wait recommendation based on forecast
         """
         # Get current price (latest in historical data)
-        current_price = df[df['material'] == material]['price'].iloc[-1]
+        if price_index is not None:
+            current_price = price_index.latest_price(material)
+        else:
+            current_price = df[df['material'] == material]['price'].iloc[-1]
         
         # Get forecasted prices for next 7 days
         future_prices = forecast_df.tail(7)['yhat'].values
-        avg_future_price = np.mean(future_prices)
-        min_future_price = np.min(future_prices)
-        max_future_price = np.max(future_prices)
-        
-        # Calculate price change percentage
-        price_change_pct = ((avg_future_price - current_price) / current_price) * 100
-        
-        # Calculate potential savings/loss
-        potential_savings = current_price - min_future_price
-        potential_loss = max_future_price - current_price
-        
-        # More sensitive decision logic (reduced threshold from 2% to 1%)
-        if price_change_pct > 1.0:
-            recommendation = "BUY NOW"
-            reason = f"Price expected to rise by {price_change_pct:.1f}% in next 7 days"
-            confidence = "High" if price_change_pct > 2 else "Medium"
-        elif price_change_pct < -1.0:
-            recommendation = "WAIT"
-            reason = f"Price expected to drop by {abs(price_change_pct):.1f}% in next 7 days"
-            confidence = "High" if price_change_pct < -2 else "Medium"
-        else:
-            # Even for stable prices, give actionable advice
-            if potential_savings > potential_loss:
-                recommendation = "WAIT"
-                reason = f"Price may drop to ${min_future_price:.2f}/ton. Wait for better opportunity"
-                confidence = "Medium"
-            elif potential_loss > potential_savings * 1.5:
-                recommendation = "BUY NOW"
-                reason = f"Price may rise to ${max_future_price:.2f}/ton. Buy before increase"
-                confidence = "Medium"
-            else:
-                recommendation = "MONITOR"
-                reason = "Price expected to remain stable. Monitor for changes"
-                confidence = "Medium"
-        
-        # Find best day to buy in next 7 days
-        best_day_idx = np.argmin(future_prices)
         
+        return build_recommendation(material, current_price, future_prices)
+    
+    def _fingerprint(self, train_data, periods):
+        """
+        Hash a prepared ds/y series together with the model hyperparameters
+        """
+        digest = hashlib.sha1()
+        digest.update(train_data['ds'].values.astype('datetime64[ns]').view('int64').tobytes())
+        digest.update(train_data['y'].values.astype('float64').tobytes())
+        digest.update(json.dumps(PROPHET_PARAMS, sort_keys=True).encode())
+        digest.update(str(periods).encode())
+        return digest.hexdigest()
+    
+    def get_cache_stats(self):
+        """Get fit cache hit/miss counters"""
         return {
-            'material': material,
-            'current_price': round(current_price, 2),
-            'avg_forecast_price': round(avg_future_price, 2),
-            'min_forecast_price': round(min_future_price, 2),
-            'price_change_pct': round(price_change_pct, 2),
-            'recommendation': recommendation,
-            'reason': reason,
-            'confidence': confidence,
-            'best_day_to_buy': best_day_idx + 1,
-            'potential_savings': round(max(0, potential_savings), 2)
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'cached_materials': len(self._fit_cache)
         }
     
-    def train_all_materials(self, df, materials):
+    def train_all_materials(self, df, materials, n_workers=1, periods=7, engine='prophet', price_index=None):
         """
         Train models for all materials
+
+        Materials whose prepared series is unchanged since the last call reuse
+        the cached model and forecast instead of being refitted.
+
+        Args:
+            df: Price history DataFrame
+            materials: Materials to train, in the order results are merged
+            n_workers: Number of worker processes (1 trains serially in-process)
+            periods: Forecast horizon in days
+            engine: 'prophet', or 'linear' for the batched trend fallback
+            price_index: PriceIndex over df (built here when not given)
         """
+        if price_index is None:
+            price_index = PriceIndex(df)
+        
+        if engine == 'linear' or Prophet is None:
+            return self.train_all_materials_linear(df, materials, periods, price_index)
+        
         results = {}
+        errors = {}
+        to_fit = {}
+        fingerprints = {}
         
         for material in materials:
             try:
-                # Train model
-                self.train_model(df, material)
+                if material not in price_index:
+                    raise ValueError(f"No price history for {material}")
                 
-                # Generate forecast
-                forecast = self.forecast(material, periods=7)
+                train_data = self.prepare_data(df, material, price_index)
+                fingerprint = self._fingerprint(train_data, periods)
+                cached = self._fit_cache.get(material)
                 
-                # Get recommendation
-                recommendation = self.get_recommendation(df, material, forecast)
+                if cached is not None and cached == fingerprint and material in self.models:
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+                    to_fit[material] = train_data
+                    fingerprints[material] = fingerprint
+            except Exception as e:
+                errors[material] = str(e)
+        
+        # Fit cache misses
+        if n_workers and n_workers > 1 and len(to_fit) > 1:
+            fitted = self._fit_parallel(to_fit, n_workers, periods)
+        else:
+            fitted = {
+                material: _fit_and_forecast(material, train_data, periods)
+                for material, train_data in to_fit.items()
+            }
+        
+        # Merge deterministically in the order materials were requested
+        for material in materials:
+            try:
+                if material in errors:
+                    raise RuntimeError(errors[material])
+                
+                if material in fitted:
+                    _, model, forecast, error = fitted[material]
+                    if error is not None:
+                        self._fit_cache.pop(material, None)
+                        raise RuntimeError(error)
+                    
+                    self.models[material] = model
+                    self.forecasts[material] = forecast
+                    self._fit_cache[material] = fingerprints[material]
+                    print(f"[OK] Trained model for {material}")
+                else:
+                    print(f"[OK] Reused cached model for {material}")
                 
-                results[material] = {
-                    'forecast': forecast,
-                    'recommendation': recommendation
-                }
+                forecast = self.forecasts[material]
+                recommendation = self.get_recommendation(df, material, forecast, price_index)
                 
-                print(f"[OK] Trained model for {material}")
+                results[material] = ForecastRecord.from_frame(material, forecast, recommendation)
                 
             except Exception as e:
                 print(f"[ERROR] Error training model for {material}: {str(e)}")
                 results[material] = None
         
         return results
+    
+    def _fit_parallel(self, to_fit, n_workers, periods):
+        """
+        Fit materials across a process pool
+        """
+        fitted = {}
+        
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(to_fit))) as executor:
+            futures = {
+                material: executor.submit(_fit_and_forecast, material, train_data, periods)
+                for material, train_data in to_fit.items()
+            }
+            
+            for material, future in futures.items():
+                try:
+                    fitted[material] = future.result()
+                except Exception as e:
+                    # Worker crashed or result could not be unpickled
+                    fitted[material] = (material, None, None, str(e))
+        
+        return fitted
+    
+    def train_all_materials_linear(self, df, materials, periods=7, price_index=None):
+        """
+        Forecast all materials with batch_linear_forecast (no Prophet models)
+        """
+        results = {}
+        batch = batch_linear_forecast(df, materials, periods=periods)
+        
+        for i, material in enumerate(batch['materials']):
+            try:
+                if np.isnan(batch['yhat'][i]).any():
+                    raise ValueError("Not enough price history")
+                
+                forecast = pd.DataFrame({
+                    'ds': batch['ds'][i],
+                    'yhat': batch['yhat'][i],
+                    'yhat_lower': batch['yhat_lower'][i],
+                    'yhat_upper': batch['yhat_upper'][i]
+                })
+                
+                # Linear forecasts replace any Prophet model for the material
+                self.models.pop(material, None)
+                self._fit_cache.pop(material, None)
+                self.forecasts[material] = forecast
+                
+                recommendation = self.get_recommendation(df, material, forecast, price_index)
+                results[material] = ForecastRecord.from_frame(material, forecast, recommendation)
+            except Exception as e:
+                print(f"[ERROR] Error forecasting {material}: {str(e)}")
+                results[material] = None
+        
+        print(f"[OK] Linear forecasts generated for {len(batch['materials'])} materials")
+        return results
+    
+    def get_components(self, material, periods=7, include_history=False):
+        """
+        Compute the full Prophet output (trend, seasonalities, ...) on request
+
+        Stored forecasts only keep yhat and bounds; this re-runs predict on
+        the fitted model when a caller needs the component columns.
+        """
+        if material not in self.models:
+            raise ValueError(f"Model for {material} not trained yet")
+        
+        model = self.models[material]
+        future = model.make_future_dataframe(periods=periods, include_history=include_history)
+        return model.predict(future)
+    
+    def save_cache(self, path, results):
+        """
+        Persist fitted models, forecasts and recommendations to a JSON file
+
+        Args:
+            path: Cache file path (written atomically)
+            results: Results dict as returned by train_all_materials
+        """
+        materials = {}
+        for material, result in results.items():
+            if not result or material not in self.models:
+                continue
+            
+            materials[material] = {
+                'fingerprint': self._fit_cache.get(material),
+                'model': model_to_json(self.models[material]),
+                'forecast': result.to_dict()
+            }
+        
+        payload = {
+            'version': CACHE_FORMAT_VERSION,
+            'saved_at': datetime.now().isoformat(),
+            'materials': materials
+        }
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_json(payload, sort_keys=False))
+        os.replace(tmp_path, path)
+    
+    def load_cache(self, path):
+        """
+        Restore models, forecasts and recommendations written by save_cache
+
+        Returns:
+            Tuple of (results dict, saved_at datetime). Results are empty when
+            the file is missing, unreadable or written by another format version.
+        """
+        if not os.path.exists(path):
+            return {}, None
+        
+        try:
+            with open(path, 'r') as f:
+                payload = json.load(f)
+        except Exception as e:
+            print(f"[ERROR] Could not read forecast cache: {str(e)}")
+            return {}, None
+        
+        if payload.get('version') != CACHE_FORMAT_VERSION:
+            print(f"[WARN] Ignoring forecast cache with format version {payload.get('version')}")
+            return {}, None
+        
+        results = {}
+        for material, entry in payload.get('materials', {}).items():
+            try:
+                model = model_from_json(entry['model'])
+                record = ForecastRecord.from_dict(material, entry['forecast'])
+                
+                self.models[material] = model
+                self.forecasts[material] = record.to_frame()
+                if entry.get('fingerprint'):
+                    self._fit_cache[material] = entry['fingerprint']
+                
+                results[material] = record
+            except Exception as e:
+                print(f"[ERROR] Could not restore cached model for {material}: {str(e)}")
+        
+        saved_at = payload.get('saved_at')
+        return results, datetime.fromisoformat(saved_at) if saved_at else None
 
 def simple_linear_forecast(df, material, periods=7):
     """
@@ -192,6 +575,87 @@ def simple_linear_forecast(df, material, periods=7):
     
     return forecast_df
 
+def batch_linear_forecast(df, materials=None, periods=7, z=1.96):
+    """
+    Vectorized fallback: fit a linear trend for every material in one pass
+
+    Series are left-aligned in a padded (materials x days) matrix and the
+    least-squares slope/intercept of every row is solved in closed form, so
+    the cost is a handful of NumPy reductions regardless of material count.
+    Trend indices match simple_linear_forecast; bounds are +/- z residual
+    standard deviations.
+
+    Args:
+        df: Price history DataFrame with date, material and price columns
+        materials: Materials to forecast (default: all materials in df)
+        periods: Forecast horizon in days
+        z: Interval width in residual standard deviations
+
+    Returns:
+        Dict with 'materials' and (materials x periods) arrays 'ds', 'yhat',
+        'yhat_lower' and 'yhat_upper'. Materials without history get NaN rows.
+    """
+    if materials is None:
+        materials = list(pd.unique(df['material']))
+    materials = list(materials)
+    n_materials = len(materials)
+    
+    codes = pd.Categorical(df['material'], categories=materials).codes
+    keep = codes >= 0
+    codes = codes[keep].astype(np.int64)
+    dates = pd.to_datetime(df['date']).values[keep]
+    prices = df['price'].to_numpy(dtype=np.float64)[keep]
+    
+    # Group rows by material, chronologically within each material
+    order = np.lexsort((dates, codes))
+    codes, dates, prices = codes[order], dates[order], prices[order]
+    
+    counts = np.bincount(codes, minlength=n_materials)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = np.arange(len(codes)) - starts[codes]
+    width = int(counts.max()) if len(codes) else 0
+    
+    # Padded series matrix and its mask
+    values = np.zeros((n_materials, width))
+    weights = np.zeros((n_materials, width))
+    values[codes, positions] = prices
+    weights[codes, positions] = 1.0
+    t = np.arange(width, dtype=np.float64)
+    
+    # Closed-form least squares for every row at once
+    s0 = weights.sum(axis=1)
+    st = weights @ t
+    stt = weights @ (t * t)
+    sy = (weights * values).sum(axis=1)
+    sty = (weights * values) @ t
+    denom = s0 * stt - st ** 2
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(denom > 0, (s0 * sty - st * sy) / denom, 0.0)
+        intercept = np.where(s0 > 0, (sy - slope * st) / s0, np.nan)
+        
+        residuals = (values - (intercept[:, None] + slope[:, None] * t)) * weights
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(s0 - 2, 1))
+    
+    # Continue each material's own trend index past its last observation
+    steps = np.arange(periods)
+    future_t = counts[:, None] + steps
+    yhat = intercept[:, None] + slope[:, None] * future_t
+    margin = z * sigma[:, None]
+    
+    last_dates = np.full(n_materials, np.datetime64('NaT'), dtype='datetime64[ns]')
+    has_data = counts > 0
+    last_dates[has_data] = dates[starts[has_data] + counts[has_data] - 1]
+    ds = last_dates[:, None] + (steps + 1) * np.timedelta64(1, 'D')
+    
+    return {
+        'materials': materials,
+        'ds': ds,
+        'yhat': yhat,
+        'yhat_lower': yhat - margin,
+        'yhat_upper': yhat + margin
+    }
+
 if __name__ == '__main__':
     # Test the model
     import os
@@ -208,5 +672,5 @@ if __name__ == '__main__':
     # Print recommendations
     for material, result in results.items():
         if result:
-            print(f"\n{material}: {result['recommendation']['recommendation']}")
-            print(f"  {result['recommendation']['reason']}")
+            print(f"\n{material}: {result.recommendation['recommendation']}")
+            print(f"  {result.recommendation['reason']}")
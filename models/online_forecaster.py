@@ -0,0 +1,159 @@
+"""
+Online price forecaster updated on every scraped price tick
+"""
+import math
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from models.forecast_model import build_recommendation
+
+class OnlineForecaster:
+    """
+    Local linear trend Kalman filter on log prices, one per material
+
+    Each material keeps a constant-size state: log level, daily log slope,
+    their 2x2 covariance and the time of the last tick. Ticks may arrive at
+    any spacing; process noise is scaled by the elapsed time in days, so an
+    update costs O(1) regardless of history length.
+    """
+    
+    def __init__(self, level_noise=2.25e-4, slope_noise=1e-6, observation_noise=2.5e-5):
+        """
+        Args:
+            level_noise: Level variance added per day (log price units)
+            slope_noise: Slope variance added per day
+            observation_noise: Measurement variance of a single tick
+        """
+        self.level_noise = level_noise
+        self.slope_noise = slope_noise
+        self.observation_noise = observation_noise
+        self.states = {}
+        # Bumped by every tick folded in, so responses built from the
+        # filter states can be versioned
+        self.version = 0
+        self._lock = threading.Lock()
+    
+    def update(self, material, price, timestamp=None):
+        """
+        Fold one price tick into the material's filter state
+        """
+        if price is None or price <= 0:
+            return
+        
+        timestamp = pd.Timestamp(timestamp if timestamp is not None else datetime.now())
+        observation = math.log(float(price))
+        
+        with self._lock:
+            self.version += 1
+            state = self.states.get(material)
+            
+            if state is None:
+                self.states[material] = {
+                    'level': observation,
+                    'slope': 0.0,
+                    'p00': self.observation_noise,
+                    'p01': 0.0,
+                    'p11': self.slope_noise * 100,
+                    'last_time': timestamp,
+                    'last_price': float(price),
+                    'ticks': 1
+                }
+                return
+            
+            # Predict forward by the elapsed time
+            dt = max((timestamp - state['last_time']).total_seconds() / 86400.0, 0.0)
+            level = state['level'] + state['slope'] * dt
+            slope = state['slope']
+            p00 = state['p00'] + 2 * dt * state['p01'] + dt * dt * state['p11'] + self.level_noise * dt
+            p01 = state['p01'] + dt * state['p11']
+            p11 = state['p11'] + self.slope_noise * dt
+            
+            # Correct with the observed log price
+            innovation = observation - level
+            s = p00 + self.observation_noise
+            k0 = p00 / s
+            k1 = p01 / s
+            
+            state['level'] = level + k0 * innovation
+            state['slope'] = slope + k1 * innovation
+            state['p00'] = (1 - k0) * p00
+            state['p01'] = (1 - k0) * p01
+            state['p11'] = p11 - k1 * p01
+            state['last_time'] = max(timestamp, state['last_time'])
+            state['last_price'] = float(price)
+            state['ticks'] += 1
+    
+    def seed(self, df, materials=None):
+        """
+        Initialize filter states by replaying a price history DataFrame
+        """
+        history = df[['date', 'material', 'price']].copy()
+        history['date'] = pd.to_datetime(history['date'])
+        history = history.sort_values('date', kind='stable')
+        
+        if materials is not None:
+            history = history[history['material'].isin(materials)]
+        
+        for date, material, price in zip(history['date'], history['material'], history['price']):
+            self.update(material, price, date)
+    
+    def _state_copy(self, material):
+        """Copy a material's filter state under the lock, or None if it has seen no ticks"""
+        with self._lock:
+            state = self.states.get(material)
+            return dict(state) if state is not None else None
+    
+    def forecast(self, material, periods=7, z=1.96):
+        """
+        Forecast the next days from the current filter state
+
+        Returns:
+            DataFrame with ds, yhat, yhat_lower and yhat_upper, or None when
+            the material has not seen any ticks yet
+        """
+        state = self._state_copy(material)
+        if state is None:
+            return None
+        return self._forecast(state, periods, z)
+    
+    def _forecast(self, state, periods, z=1.96):
+        """Forecast from a copied filter state"""
+        horizon = np.arange(1, periods + 1, dtype=np.float64)
+        mean = state['level'] + state['slope'] * horizon
+        variance = (
+            state['p00'] + 2 * horizon * state['p01'] + horizon ** 2 * state['p11']
+            + self.level_noise * horizon + self.slope_noise * horizon ** 3 / 3
+            + self.observation_noise
+        )
+        spread = z * np.sqrt(variance)
+        
+        start = state['last_time'].normalize()
+        return pd.DataFrame({
+            'ds': pd.date_range(start=start + pd.Timedelta(days=1), periods=periods),
+            'yhat': np.exp(mean),
+            'yhat_lower': np.exp(mean - spread),
+            'yhat_upper': np.exp(mean + spread)
+        })
+    
+    def get_recommendation(self, material, periods=7):
+        """
+        Generate buy/wait recommendation from the latest tick and filter state
+        
+        Returns:
+            Recommendation dict, or None when the material has not seen any
+            ticks yet
+        """
+        # One copy, so the price and the forecast come from the same tick
+        state = self._state_copy(material)
+        if state is None:
+            return None
+        
+        forecast = self._forecast(state, periods)
+        return build_recommendation(material, state['last_price'], forecast['yhat'].values)
+    
+    def last_tick(self, material):
+        """Get the timestamp of the latest tick seen for a material"""
+        state = self._state_copy(material)
+        return state['last_time'] if state else None
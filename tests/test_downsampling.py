@@ -0,0 +1,88 @@
+"""
+Downsampling indices against straightforward reference implementations
+"""
+import numpy as np
+import pytest
+
+from utils.downsampling import downsample_indices, lttb_indices, minmax_indices
+
+def reference_lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets as published, one point at a time"""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    selected = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        stop = int((i + 1) * every) + 1
+        next_stop = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[stop:next_stop]) / (next_stop - stop)
+        avg_y = sum(y[stop:next_stop]) / (next_stop - stop)
+        
+        best, best_area = start, -1.0
+        for j in range(start, stop):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+def reference_minmax(y, n_out):
+    """First minimum and last maximum of each bucket, plus the end points"""
+    n = len(y)
+    n_buckets = (n_out - 2) // 2
+    selected = {0, n - 1}
+    for bucket in range(n_buckets):
+        members = [i for i in range(n) if i * n_buckets // n == bucket]
+        values = [y[i] for i in members]
+        selected.add(members[values.index(min(values))])
+        selected.add(members[len(values) - 1 - values[::-1].index(max(values))])
+    return sorted(selected)
+
+def random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.uniform(0, 1e6, n))
+    return x, np.cumsum(rng.normal(0, 1, n))
+
+@pytest.mark.parametrize('n, n_out', [(10, 3), (10, 9), (100, 7), (1000, 50), (1001, 64), (5000, 999)])
+def test_lttb_matches_reference(n, n_out):
+    x, y = random_walk(n, seed=n + n_out)
+    indices = lttb_indices(x, y, n_out)
+    assert indices.tolist() == reference_lttb(x.tolist(), y.tolist(), n_out)
+
+@pytest.mark.parametrize('n, n_out', [(10, 4), (11, 5), (100, 8), (1000, 51), (1001, 64), (5000, 1000)])
+def test_minmax_matches_reference(n, n_out):
+    x, y = random_walk(n, seed=n + n_out)
+    indices = minmax_indices(y, n_out)
+    assert indices.tolist() == reference_minmax(y.tolist(), n_out)
+    assert len(indices) <= n_out
+    assert y[indices].min() == y.min()
+    assert y[indices].max() == y.max()
+
+def test_minmax_with_ties():
+    y = np.array([1.0, 3.0, 1.0, 3.0, 2.0, 2.0, 5.0, 5.0, 0.0, 0.0])
+    assert minmax_indices(y, 6).tolist() == reference_minmax(y.tolist(), 6)
+
+def test_short_series_are_kept_whole():
+    x, y = random_walk(20, seed=0)
+    assert lttb_indices(x, y, 20).tolist() == list(range(20))
+    assert lttb_indices(x, y, 2).tolist() == list(range(20))
+    assert minmax_indices(y, 25).tolist() == list(range(20))
+    assert minmax_indices(y, 3).tolist() == list(range(20))
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample_indices_keeps_end_points(method):
+    x, y = random_walk(2000, seed=3)
+    indices = downsample_indices(x, y, 100, method)
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(indices) <= 100
+
+def test_downsample_indices_rejects_bad_arguments():
+    x, y = random_walk(100, seed=4)
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 3)
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 10, method='average')
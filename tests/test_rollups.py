@@ -0,0 +1,212 @@
+"""
+PriceRollups.advance must give the same bars as a full PriceRollups.build
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.price_index import PriceIndex
+from utils.rollups import BAR_FIELDS, RESOLUTIONS, PriceRollups, merge_bars, ohlc_bars
+
+MATERIALS = ['Copper', 'Aluminum', 'Steel']
+
+@pytest.fixture(autouse=True)
+def spliced_bars_cover_every_tick(monkeypatch):
+    """
+    Fail when advance() needs its full rebuild fallback
+    
+    The fallback would otherwise hide splice errors that lose or duplicate
+    ticks; none of these histories were rewritten by another process.
+    """
+    update_bars = PriceRollups._update_bars
+    
+    def checked(previous, dates, prices, volumes, unit, since):
+        updated = update_bars(previous, dates, prices, volumes, unit, since)
+        assert updated['ticks'].sum() == len(dates)
+        return updated
+    
+    monkeypatch.setattr(PriceRollups, '_update_bars', staticmethod(checked))
+
+def make_history(seed=0, days=4, freq='17min', materials=MATERIALS):
+    """Ticks for every material at a fixed spacing, with seqs in date order"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2025-01-01 00:05', periods=days * 24 * 60 // 17, freq=freq)
+    history = pd.DataFrame({
+        'date': np.repeat(times, len(materials)),
+        'material': np.tile(materials, len(times)),
+        'price': rng.uniform(1000, 2000, len(times) * len(materials)).round(2),
+        'volume': rng.integers(1, 100, len(times) * len(materials)),
+        'source': 'Test'
+    })
+    history['seq'] = np.arange(1, len(history) + 1, dtype=np.int64)
+    return history
+
+def new_rows(history, dates, material='Copper', price=1500.0):
+    """Rows added after history, numbered after its highest seq"""
+    dates = pd.to_datetime(list(dates))
+    return pd.DataFrame({
+        'date': dates,
+        'material': material,
+        'price': price + np.arange(len(dates)),
+        'volume': 7,
+        'source': 'Test',
+        'seq': history['seq'].max() + np.arange(1, len(dates) + 1, dtype=np.int64)
+    })
+
+def modify(history, positions, factor=1.1):
+    """Change the price of rows, moving them to the end of the sequence"""
+    history = history.copy()
+    labels = history.index[positions]
+    history.loc[labels, 'price'] = history.loc[labels, 'price'] * factor
+    history.loc[labels, 'seq'] = history['seq'].max() + np.arange(1, len(labels) + 1)
+    return history
+
+def assert_advance_matches_build(before, after):
+    """Advance the rollups of before to after and compare with a rebuild"""
+    previous = PriceRollups.build(PriceIndex(before, version=1))
+    index = PriceIndex(after, version=2)
+    advanced = previous.advance(index)
+    rebuilt = PriceRollups.build(index)
+    
+    assert advanced.bars.keys() == rebuilt.bars.keys()
+    for key in rebuilt.bars:
+        for field in BAR_FIELDS:
+            np.testing.assert_array_equal(advanced.bars[key][field], rebuilt.bars[key][field], err_msg=f"{key} {field}")
+    assert advanced.max_seq == rebuilt.max_seq
+    return advanced
+
+def test_append_within_the_latest_bar():
+    history = make_history()
+    last = history['date'].max()
+    after = pd.concat([history, new_rows(history, [last + pd.Timedelta(minutes=1)])], ignore_index=True)
+    assert_advance_matches_build(history, after)
+
+def test_append_new_bars():
+    history = make_history()
+    last = history['date'].max()
+    rows = pd.concat([
+        new_rows(history, [last + pd.Timedelta(hours=3), last + pd.Timedelta(days=2)], material=material)
+        for material in MATERIALS
+    ], ignore_index=True)
+    rows['seq'] = history['seq'].max() + np.arange(1, len(rows) + 1)
+    assert_advance_matches_build(history, pd.concat([history, rows], ignore_index=True))
+
+def test_no_changes_keeps_bars():
+    history = make_history()
+    previous = PriceRollups.build(PriceIndex(history, version=1))
+    advanced = previous.advance(PriceIndex(history, version=2))
+    for key, bars in previous.bars.items():
+        assert advanced.bars[key] is bars
+
+def test_modified_latest_rows():
+    history = make_history()
+    latest = history.groupby('material', observed=True).tail(1).index
+    assert_advance_matches_build(history, modify(history, history.index.get_indexer(latest)))
+
+def test_modified_middle_rows():
+    history = make_history()
+    # One row of each material around the middle of the history, one of them the high of its bar
+    middle = len(history) // 2
+    after = modify(history, [middle, middle + 1, middle + 2], factor=3.0)
+    assert_advance_matches_build(history, after)
+
+def test_modified_first_row():
+    history = make_history()
+    assert_advance_matches_build(history, modify(history, [0], factor=0.5))
+
+@pytest.mark.parametrize('drop', [1, 3, 10, 200])
+def test_retention_drops_head(drop):
+    history = make_history()
+    # Drops a few ticks of the first bar, or whole bars
+    assert_advance_matches_build(history, history.iloc[drop:].reset_index(drop=True))
+
+def test_retention_drop_with_append():
+    history = make_history()
+    cutoff = history['date'].min() + pd.Timedelta(hours=5, minutes=30)
+    kept = history[history['date'] >= cutoff]
+    last = history['date'].max()
+    after = pd.concat([kept, new_rows(history, [last + pd.Timedelta(minutes=50)])], ignore_index=True)
+    assert_advance_matches_build(history, after)
+
+def test_out_of_order_rows():
+    history = make_history()
+    # Late ticks: higher seqs than every row, dated inside existing bars
+    first = history['date'].min()
+    dates = [first + pd.Timedelta(days=1, minutes=3), first + pd.Timedelta(hours=2, minutes=1)]
+    after = pd.concat([history, new_rows(history, dates, price=5000.0)], ignore_index=True)
+    assert_advance_matches_build(history, after)
+
+def test_out_of_order_row_before_first_bar():
+    history = make_history()
+    dates = [history['date'].min() - pd.Timedelta(days=1)]
+    after = pd.concat([history, new_rows(history, dates, material='Steel')], ignore_index=True)
+    assert_advance_matches_build(history, after)
+
+def test_new_material():
+    history = make_history()
+    last = history['date'].max()
+    after = pd.concat([history, new_rows(history, [last, last + pd.Timedelta(hours=1)], material='Nickel')], ignore_index=True)
+    assert_advance_matches_build(history, after)
+
+def test_material_dropped():
+    history = make_history()
+    after = history[history['material'] != 'Steel']
+    last = history['date'].max()
+    after = pd.concat([after, new_rows(history, [last + pd.Timedelta(minutes=5)])], ignore_index=True)
+    assert_advance_matches_build(history, after)
+
+def test_seqs_renumbered_lower():
+    history = make_history()
+    # Another process rewrote the history with lower seqs: advance rebuilds
+    after = history.iloc[5:].assign(seq=np.arange(1, len(history) - 4)).reset_index(drop=True)
+    assert_advance_matches_build(history, after)
+
+def test_chained_advances_match_build():
+    history = make_history()
+    rollups = PriceRollups.build(PriceIndex(history, version=1))
+    rng = np.random.default_rng(1)
+    for step in range(20):
+        last = history['date'].max()
+        rows = new_rows(history, [last + pd.Timedelta(minutes=int(rng.integers(1, 120)))],
+                        material=MATERIALS[step % len(MATERIALS)], price=float(rng.uniform(1000, 2000)))
+        history = pd.concat([history, rows], ignore_index=True)
+        if step % 3 == 0:
+            history = modify(history, [int(rng.integers(len(history)))])
+        if step % 5 == 0:
+            history = history.iloc[int(rng.integers(1, 20)):].reset_index(drop=True)
+        rollups = rollups.advance(PriceIndex(history, version=step + 2))
+    
+    rebuilt = PriceRollups.build(PriceIndex(history))
+    for key in rebuilt.bars:
+        for field in BAR_FIELDS:
+            np.testing.assert_array_equal(rollups.bars[key][field], rebuilt.bars[key][field], err_msg=f"{key} {field}")
+
+def test_ohlc_bars_values():
+    dates = pd.to_datetime(['2025-01-01 09:10', '2025-01-01 09:50', '2025-01-01 10:00', '2025-01-02 08:00']).values
+    bars = ohlc_bars(dates, [5.0, 7.0, 3.0, 4.0], [1, 2, 3, 4], RESOLUTIONS['hourly'])
+    assert bars['open'].tolist() == [5.0, 3.0, 4.0]
+    assert bars['high'].tolist() == [7.0, 3.0, 4.0]
+    assert bars['close'].tolist() == [7.0, 3.0, 4.0]
+    assert bars['volume'].tolist() == [3, 3, 4]
+    assert bars['ticks'].tolist() == [2, 1, 1]
+    
+    daily = ohlc_bars(dates, [5.0, 7.0, 3.0, 4.0], [1, 2, 3, 4], RESOLUTIONS['daily'])
+    assert daily['low'].tolist() == [3.0, 4.0]
+    assert daily['close'].tolist() == [3.0, 4.0]
+
+@pytest.mark.parametrize('max_points', [1, 2, 5, 7, 1000])
+def test_merge_bars_matches_coarser_aggregation(max_points):
+    history = make_history()
+    copper = history[history['material'] == 'Copper']
+    dates = copper['date'].to_numpy(dtype='datetime64[ns]')
+    bars = ohlc_bars(dates, copper['price'].to_numpy(), copper['volume'].to_numpy(), 'h')
+    merged = merge_bars(bars, max_points)
+    
+    count = len(bars['time'])
+    assert len(merged['time']) <= max_points or count <= max_points
+    assert merged['ticks'].sum() == len(copper)
+    assert merged['volume'].sum() == copper['volume'].sum()
+    assert merged['high'].max() == copper['price'].max()
+    assert merged['low'].min() == copper['price'].min()
+    assert merged['open'][0] == copper['price'].iloc[0]
+    assert merged['close'][-1] == copper['price'].iloc[-1]
@@ -0,0 +1,211 @@
+"""
+Columnar, memory-mapped copy of the price history snapshot
+
+Each column is a raw NumPy .npy file: dates as int64 nanoseconds, material
+and source as category codes, prices as float64. Rows are sorted by material,
+then date, so every material's history is one contiguous slice. Loading maps
+the files instead of parsing a CSV, so startup time and resident memory do
+not grow with the history; pages are read from disk as they are touched.
+"""
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2
+
+# Column name -> on-disk dtype (None: category codes, sized like pandas sizes them)
+COLUMN_DTYPES = {
+    'date': np.int64,
+    'material': None,
+    'price': np.float64,
+    'volume': np.int64,
+    'source': None,
+    'seq': np.int64,
+    'replaces': np.int64
+}
+
+CURRENT_FILE = 'CURRENT'
+
+def write_columns(directory, price_data, stamp=None):
+    """
+    Write price history as a new generation of column files
+    
+    The generation is written to its own subdirectory and then made current
+    by atomically replacing the CURRENT pointer, so readers never see a mix
+    of old and new columns.
+    
+    Args:
+        directory: Directory holding the generations
+        price_data: Price history (date, material, price, volume, source,
+            seq and optionally replaces)
+        stamp: JSON-serializable identity of the source the columns were
+            built from, returned by read_meta for staleness checks
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = _current_generation(directory)
+    generation = f"gen-{(int(previous.split('-')[1]) + 1) if previous else 1}"
+    path = os.path.join(directory, generation)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    
+    dates = pd.to_datetime(price_data['date'], format='ISO8601').to_numpy(dtype='datetime64[ns]').view(np.int64)
+    material_codes, materials = pd.factorize(price_data['material'].astype(str), sort=True)
+    source_codes, sources = pd.factorize(price_data['source'].astype(str), sort=True)
+    
+    # Material-major, chronological within each material; stable for equal dates
+    order = np.lexsort((dates, material_codes))
+    columns = {
+        'date': dates,
+        'material': material_codes,
+        'price': price_data['price'].to_numpy(dtype=np.float64),
+        'volume': price_data['volume'].to_numpy(dtype=np.int64),
+        'source': source_codes,
+        'seq': price_data['seq'].to_numpy(dtype=np.int64),
+        'replaces': (price_data['replaces'].fillna(0).to_numpy(dtype=np.int64) if 'replaces' in price_data
+                     else np.zeros(len(price_data), dtype=np.int64))
+    }
+    categories = {'material': materials, 'source': sources}
+    for name, dtype in COLUMN_DTYPES.items():
+        if dtype is None:
+            # The code width pandas would pick, so categoricals can wrap the mapped codes
+            dtype = pd.Categorical.from_codes([], categories=categories[name]).codes.dtype
+        with open(os.path.join(path, f'{name}.npy'), 'wb') as f:
+            np.save(f, columns[name][order].astype(dtype, copy=False))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    counts = np.bincount(material_codes, minlength=len(materials))
+    meta = {
+        'format': FORMAT_VERSION,
+        'rows': int(len(order)),
+        'materials': [str(material) for material in materials],
+        'counts': counts.tolist(),
+        'sources': [str(source) for source in sources],
+        'stamp': stamp
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    
+    tmp_pointer = os.path.join(directory, CURRENT_FILE + '.tmp')
+    with open(tmp_pointer, 'w') as f:
+        f.write(generation)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, os.path.join(directory, CURRENT_FILE))
+    
+    # Older generations may still be mapped by a running process; unlinking
+    # keeps their pages valid until they are unmapped
+    for name in os.listdir(directory):
+        if name.startswith('gen-') and name != generation:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+def _current_generation(directory):
+    """Name of the current generation subdirectory, or None"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def read_meta(directory):
+    """
+    Get the current generation's metadata
+    
+    Returns:
+        Metadata dict, or None if there are no (readable) columns
+    """
+    generation = _current_generation(directory)
+    if generation is None:
+        return None
+    try:
+        with open(os.path.join(directory, generation, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('format') == FORMAT_VERSION else None
+
+def load_columns(directory):
+    """
+    Map the current generation into a price history DataFrame
+    
+    The frame's columns are backed by the memory-mapped files (read-only)
+    rather than copies: dates are datetime64[ns], material and source are
+    categoricals over the stored codes.
+    
+    Returns:
+        DataFrame sorted by material then date, or None if there are no
+        (valid) columns
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        return None
+    
+    path = os.path.join(directory, _current_generation(directory))
+    try:
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in COLUMN_DTYPES}
+    except (OSError, ValueError):
+        return None
+    if any(len(array) != meta['rows'] for array in arrays.values()):
+        return None
+    
+    return pd.DataFrame({
+        'date': arrays['date'].view('datetime64[ns]'),
+        'material': pd.Categorical.from_codes(arrays['material'], categories=meta['materials'], validate=False),
+        'price': arrays['price'],
+        'volume': arrays['volume'],
+        'source': pd.Categorical.from_codes(arrays['source'], categories=meta['sources'], validate=False),
+        'seq': arrays['seq'],
+        'replaces': arrays['replaces']
+    }, copy=False)
+
+if __name__ == '__main__':
+    # Startup cost of parsing the CSV versus mapping the columns, each
+    # measured in a fresh process
+    import resource
+    import subprocess
+    import sys
+    import tempfile
+    import time
+    
+    if len(sys.argv) == 3:
+        mode, directory = sys.argv[1:]
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from utils.price_index import PriceIndex
+        
+        start = time.perf_counter()
+        if mode == 'csv':
+            df = pd.read_csv(os.path.join(directory, 'prices.csv'))
+        else:
+            df = load_columns(os.path.join(directory, 'columns'))
+        index = PriceIndex(df)
+        elapsed = time.perf_counter() - start
+        
+        prices = index.prices_for('Copper')
+        try:
+            # Peak RSS of this process image (ru_maxrss includes the parent's on Linux)
+            with open('/proc/self/status') as f:
+                rss = next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+        except OSError:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{mode}: {len(df):,} rows loaded and indexed in {elapsed * 1000:.0f} ms, "
+              f"max RSS {rss:.0f} MB, Copper mean {prices.mean():,.0f}")
+        sys.exit()
+    
+    n_days = 200_000
+    materials = ['Copper', 'Aluminum', 'Steel']
+    history = pd.DataFrame({
+        'date': np.repeat(pd.date_range('1700-01-01', periods=n_days, freq='D'), len(materials)).strftime('%Y-%m-%d'),
+        'material': np.tile(materials, n_days),
+        'price': np.random.uniform(60000, 750000, n_days * len(materials)).round(2),
+        'volume': np.random.randint(1000, 10000, n_days * len(materials)),
+        'source': 'Market Data'
+    })
+    history['seq'] = np.arange(1, len(history) + 1)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        history.to_csv(os.path.join(directory, 'prices.csv'), index=False)
+        write_columns(os.path.join(directory, 'columns'), history)
+        for mode in ('csv', 'columns'):
+            subprocess.run([sys.executable, __file__, mode, directory], check=True)
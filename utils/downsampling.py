@@ -0,0 +1,114 @@
+"""
+Downsampling of price series for charting
+"""
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+def lttb_indices(x, y, n_out):
+    """
+    Select points with Largest-Triangle-Three-Buckets
+    
+    The first and last points are always kept. The rest are split into
+    n_out - 2 equal buckets; from each bucket the point forming the largest
+    triangle with the previously selected point and the next bucket's
+    average is kept, which preserves the visual shape of the series.
+    
+    Args:
+        x: Float array of x values (e.g. timestamps), ascending
+        y: Float array of y values
+        n_out: Number of points to keep
+    
+    Returns:
+        Sorted int array of selected indices
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        
+        # Average of the next bucket (the last point for the final bucket)
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        
+        # Twice the triangle areas, for every candidate in the bucket at once
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    
+    return selected
+
+def minmax_indices(y, n_out):
+    """
+    Select the minimum and maximum of each of (n_out - 2) // 2 equal buckets
+    
+    Keeps every local extreme a chart would show, including the overall
+    high and low. The first and last points are always kept.
+    
+    Args:
+        y: Float array of y values
+        n_out: Maximum number of points to keep (at least 4)
+    
+    Returns:
+        Sorted int array of selected indices
+    """
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    
+    n_buckets = (n_out - 2) // 2
+    buckets = np.arange(n) * n_buckets // n
+    
+    # Within each bucket, sort by value: the first row is the min, the last the max
+    order = np.lexsort((y, buckets))
+    sorted_buckets = buckets[order]
+    is_first = np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]]
+    is_last = np.r_[sorted_buckets[1:] != sorted_buckets[:-1], True]
+    
+    selected = np.concatenate(([0, n - 1], order[is_first], order[is_last]))
+    return np.unique(selected)
+
+def downsample_indices(x, y, max_points, method='lttb'):
+    """
+    Get indices of at most max_points points to plot
+    
+    Args:
+        x: Float array of x values, ascending
+        y: Float array of y values
+        max_points: Maximum number of points to return (at least 4)
+        method: 'lttb' or 'minmax'
+    """
+    if max_points < 4:
+        raise ValueError("max_points must be at least 4")
+    if method == 'lttb':
+        return lttb_indices(x, y, max_points)
+    if method == 'minmax':
+        return minmax_indices(y, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+if __name__ == '__main__':
+    # Downsample a long random walk and report timings
+    import time
+    
+    n = 1_000_000
+    x = np.arange(n, dtype=np.float64)
+    y = np.cumsum(np.random.normal(0, 1, n))
+    
+    for method in METHODS:
+        start = time.perf_counter()
+        indices = downsample_indices(x, y, 1000, method)
+        elapsed = time.perf_counter() - start
+        print(f"{method}: {n:,} -> {len(indices)} points in {elapsed * 1000:.1f} ms "
+              f"(min kept: {y[indices].min() == y.min()}, max kept: {y[indices].max() == y.max()})")
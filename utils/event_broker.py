@@ -0,0 +1,102 @@
+"""
+In-process event broker behind the /api/stream server-sent events endpoint
+"""
+import threading
+import time
+from collections import deque
+
+from utils.serialization import encode_json
+
+class EventBroker:
+    """
+    Numbered events kept in a ring buffer that stream clients wait on
+    
+    Event ids increase monotonically, so a reconnecting client resumes by
+    sending the last id it saw. Ids carry a per-process epoch; if a client's
+    id comes from before a restart or has already left the buffer, the
+    client is told to reset instead.
+    """
+    
+    def __init__(self, buffer_size=256):
+        """
+        Args:
+            buffer_size: Number of recent events kept for resuming clients
+        """
+        self._events = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self.epoch = format(int(time.time()), 'x')
+    
+    def publish(self, event_type, data):
+        """
+        Publish an event to every connected client
+        
+        Args:
+            event_type: SSE event name (e.g. 'prices', 'forecast', 'alert')
+            data: JSON-serializable payload
+        
+        Returns:
+            The event id
+        """
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, encode_json(data, sort_keys=False).decode('utf-8')))
+            self._condition.notify_all()
+            return self._last_id
+    
+    def latest_id(self):
+        """Get the id of the most recent event (0 if none)"""
+        with self._condition:
+            return self._last_id
+    
+    def parse_event_id(self, value):
+        """
+        Parse a Last-Event-ID sent by a client
+        
+        Returns:
+            The event number, or None if the id is malformed or was issued
+            by another process
+        """
+        epoch, _, number = str(value).partition('-')
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+    
+    def _since(self, last_id):
+        """Events after last_id, or None if they can no longer be replayed"""
+        if last_id > self._last_id:
+            return None
+        if self._events and last_id < self._events[0][0] - 1:
+            return None
+        return [event for event in self._events if event[0] > last_id]
+    
+    def wait(self, last_id, timeout):
+        """
+        Wait for events after last_id
+        
+        Args:
+            last_id: Id of the last event the client has seen
+            timeout: Seconds to wait when there are no new events
+        
+        Returns:
+            List of (id, event_type, data) tuples (empty on timeout), or None
+            if the events after last_id are gone and the client must reset
+        """
+        with self._condition:
+            events = self._since(last_id)
+            if events == []:
+                self._condition.wait(timeout)
+                events = self._since(last_id)
+            return events
+    
+    def format(self, event_id, event_type, data):
+        """Format one event in the SSE wire format"""
+        return f"id: {self.epoch}-{event_id}\nevent: {event_type}\ndata: {data}\n\n"
+    
+    def get_stats(self):
+        """Get broker statistics"""
+        with self._condition:
+            return {
+                'last_event_id': self._last_id,
+                'buffered': len(self._events)
+            }
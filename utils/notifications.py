@@ -4,6 +4,11 @@ Notification system for price alerts and inventory warnings
 from datetime import datetime
 import json
 import os
+import sys
+
+# Add the project root to the path to import utils when run directly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.serialization import write_json
 
 class NotificationManager:
     """
@@ -13,6 +18,10 @@ class NotificationManager:
     def __init__(self, alert_log_path='data/alerts.json'):
         self.alert_log_path = alert_log_path
         self.alerts = []
+        # Incremented on every change to the alert list
+        self.version = 0
+        # Callbacks run with each newly created alert
+        self.listeners = []
         self.load_alerts()
     
     def load_alerts(self):
@@ -25,12 +34,13 @@ class NotificationManager:
                 self.alerts = []
         else:
             self.alerts = []
+        self.version += 1
     
     def save_alerts(self):
         """Save alerts to file"""
+        self.version += 1
         os.makedirs(os.path.dirname(self.alert_log_path), exist_ok=True)
-        with open(self.alert_log_path, 'w') as f:
-            json.dump(self.alerts[-100:], f, indent=2)  # Keep last 100 alerts
+        write_json(self.alert_log_path, self.alerts[-100:])  # Keep last 100 alerts
     
     def create_alert(self, alert_type, material, message, severity='INFO'):
         """
@@ -58,8 +68,23 @@ class NotificationManager:
         # Simulate sending notification
         self._send_notification(alert)
         
+        for listener in self.listeners:
+            try:
+                listener(alert)
+            except Exception as e:
+                print(f"Error in alert listener: {str(e)}")
+        
         return alert
     
+    def add_listener(self, callback):
+        """
+        Register a callback to run with every new alert
+        
+        Args:
+            callback: Function taking the alert dict
+        """
+        self.listeners.append(callback)
+    
     def _send_notification(self, alert):
         """
         Simulate sending notification (email/WhatsApp)
@@ -291,11 +316,15 @@ class NotificationManager:
         from datetime import timedelta
         cutoff_time = datetime.now() - timedelta(days=days)
         
-        self.alerts = [
+        kept = [
             alert for alert in self.alerts
             if datetime.fromisoformat(alert['timestamp']) > cutoff_time
         ]
-        self.save_alerts()
+        
+        # Only rewrite the log (and bump the version) when something expired
+        if len(kept) != len(self.alerts):
+            self.alerts = kept
+            self.save_alerts()
         
         return len(self.alerts)
 
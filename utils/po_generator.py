@@ -6,19 +6,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
 import os
-import numpy as np
+import sys
 
-
-class NumpyEncoder(json.JSONEncoder):
-    """Custom JSON encoder for numpy types"""
-    def default(self, obj):
-        if isinstance(obj, (np.integer, np.int64, np.int32)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64, np.float32)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super(NumpyEncoder, self).default(obj)
+# Add the project root to the path to import utils when run directly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.serialization import write_json
 
 
 class PurchaseOrderGenerator:
@@ -48,20 +40,6 @@ class PurchaseOrderGenerator:
         with open(self.counter_file, 'w') as f:
             json.dump({'counter': self.po_counter}, f)
     
-    def _convert_value(self, value):
-        """Convert numpy types to native Python types"""
-        if isinstance(value, (np.integer, np.int64, np.int32)):
-            return int(value)
-        elif isinstance(value, (np.floating, np.float64, np.float32)):
-            return float(value)
-        elif isinstance(value, np.ndarray):
-            return value.tolist()
-        elif isinstance(value, dict):
-            return {k: self._convert_value(v) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [self._convert_value(item) for item in value]
-        return value
-    
     def _get_next_po_number(self) -> str:
         """Generate next PO number"""
         self.po_counter += 1
@@ -89,10 +67,6 @@ class PurchaseOrderGenerator:
         Returns:
             Purchase order dictionary
         """
-        # Convert all inputs to native Python types
-        vendor = self._convert_value(vendor)
-        inventory_data = self._convert_value(inventory_data)
-        recommendation = self._convert_value(recommendation)
         quantity = float(quantity)
         
         po_number = self._get_next_po_number()
@@ -201,9 +175,7 @@ class PurchaseOrderGenerator:
         """Save PO to JSON file"""
         filename = f"{po['po_number']}.json"
         filepath = os.path.join(self.po_dir, filename)
-        
-        with open(filepath, 'w') as f:
-            json.dump(po, f, indent=2, cls=NumpyEncoder)
+        write_json(filepath, po)
     
     def get_po(self, po_number: str) -> Optional[Dict]:
         """Retrieve a PO by number"""
@@ -0,0 +1,169 @@
+"""
+Per-material index over the price history
+"""
+import numpy as np
+import pandas as pd
+
+def _is_grouped(codes, dates):
+    """Whether rows are sorted by material code, then date"""
+    code_steps = np.diff(codes)
+    return bool(np.all((code_steps > 0) | ((code_steps == 0) & (np.diff(dates) >= np.timedelta64(0)))))
+
+class PriceIndex:
+    """
+    Price history grouped into one contiguous, date-sorted slice per material
+    
+    Built once per data version. Lookups are then O(1) slices instead of a
+    full-frame `df[df['material'] == material]` filter per material. A
+    frame that is not grouped by material yet is copied in sorted order, so
+    the index stays valid even if that frame is later modified. A frame
+    that is already grouped (e.g. the memory-mapped columnar history) is
+    indexed as-is, without a copy, and must not be modified afterwards.
+    """
+    
+    def __init__(self, df, version=None):
+        """
+        Args:
+            df: Price history DataFrame (date, material, price, volume, source)
+            version: Data version the index was built from
+        """
+        self.version = version
+        
+        dates = pd.to_datetime(df['date'], format='ISO8601').values.astype('datetime64[ns]', copy=False)
+        codes, materials = pd.factorize(df['material'])
+        
+        if _is_grouped(codes, dates):
+            # Already material-major and chronological (e.g. the memory-mapped
+            # columnar history): index the frame as-is, without copying it
+            self.frame = df
+            self.dates = dates
+            sorted_codes = codes
+        else:
+            # Group by material, chronologically within each material; the
+            # stable sort keeps file order for rows sharing a date
+            order = np.lexsort((dates, codes))
+            self.frame = df.iloc[order]
+            self.dates = dates[order]
+            sorted_codes = codes[order]
+        
+        self.labels = self.frame.index.values
+        self.prices = self.frame['price'].to_numpy(dtype=np.float64)
+        
+        counts = np.bincount(sorted_codes, minlength=len(materials))
+        stops = np.cumsum(counts)
+        starts = stops - counts
+        
+        # Row positions in seq order, built on first changes_since call
+        self._seq_order = None
+        self._sorted_seqs = None
+        self.max_seq = int(self.frame['seq'].max()) if 'seq' in self.frame and len(self.frame) else 0
+        
+        self.slices = {
+            material: (int(start), int(stop))
+            for material, start, stop in zip(materials, starts, stops)
+        }
+        
+        # Latest and previous observation per material
+        self._latest = {}
+        for material, (start, stop) in self.slices.items():
+            row = self.frame.iloc[stop - 1]
+            self._latest[material] = {
+                'price': float(self.prices[stop - 1]),
+                'prev_price': float(self.prices[stop - 2]) if stop - start > 1 else None,
+                'date': row['date'],
+                'volume': row['volume'] if 'volume' in row else None,
+                'source': row['source'] if 'source' in row else None,
+                'label': self.labels[stop - 1],
+                'count': stop - start
+            }
+    
+    def __contains__(self, material):
+        return material in self.slices
+    
+    def materials(self):
+        """Get indexed materials"""
+        return list(self.slices)
+    
+    def frame_for(self, material):
+        """Get a material's rows in date order"""
+        start, stop = self.slices.get(material, (0, 0))
+        return self.frame.iloc[start:stop]
+    
+    def dates_for(self, material):
+        """Get a material's dates as a datetime64 array (a view, not a copy)"""
+        start, stop = self.slices.get(material, (0, 0))
+        return self.dates[start:stop]
+    
+    def prices_for(self, material):
+        """Get a material's prices as a float array (a view, not a copy)"""
+        start, stop = self.slices.get(material, (0, 0))
+        return self.prices[start:stop]
+    
+    def range_for(self, material, start=None, end=None):
+        """
+        Get the positions of a material's rows between two dates
+        
+        Args:
+            material: Material name
+            start: First date to include (None for the beginning)
+            end: Last date to include (None for the latest row)
+        
+        Returns:
+            (start, stop) positions into frame, dates and prices
+        """
+        first, last = self.slices.get(material, (0, 0))
+        dates = self.dates[first:last]
+        
+        lo = np.searchsorted(dates, np.datetime64(start, 'ns'), side='left') if start is not None else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'ns'), side='right') if end is not None else len(dates)
+        return first + int(lo), first + int(max(lo, hi))
+    
+    def history(self, material, start=None, end=None):
+        """
+        Get a material's rows between two dates
+        
+        Same interface as SQLiteStore.history, so endpoints can read from
+        either.
+        
+        Returns:
+            Tuple of (frame, datetime64 dates, float prices) in date order;
+            the arrays are views, not copies
+        """
+        lo, hi = self.range_for(material, start, end)
+        return self.frame.iloc[lo:hi], self.dates[lo:hi], self.prices[lo:hi]
+    
+    def changes_since(self, since):
+        """
+        Get the positions of rows added or modified after a sequence number
+        
+        Args:
+            since: Last seq the caller has seen
+        
+        Returns:
+            Int array of positions into frame, in seq order
+        """
+        if self._seq_order is None:
+            if 'seq' not in self.frame:
+                return np.array([], dtype=np.int64)
+            seqs = self.frame['seq'].to_numpy(dtype=np.int64)
+            order = np.argsort(seqs, kind='stable')
+            self._sorted_seqs = seqs[order]
+            self._seq_order = order
+        
+        start = np.searchsorted(self._sorted_seqs, since, side='right')
+        return self._seq_order[start:]
+    
+    def latest(self, material):
+        """
+        Get the latest row summary for a material
+        
+        Returns:
+            Dict with price, prev_price, date, volume, source, the row label in
+            the source frame and the row count, or None for unknown materials
+        """
+        return self._latest.get(material)
+    
+    def latest_price(self, material):
+        """Get a material's latest price"""
+        latest = self._latest.get(material)
+        return latest['price'] if latest else None
@@ -0,0 +1,284 @@
+"""
+Append-only price log with periodic compaction into the price history CSV
+
+The history CSV is a snapshot that is only rewritten on compaction. Between
+compactions each scrape appends just its new rows to the log, so the cost of
+persisting a scrape does not grow with the history. At startup the snapshot
+and the log are replayed into one frame.
+
+Optionally the snapshot is also kept as memory-mapped column files (see
+utils/columnar_history.py), which are loaded instead of parsing the CSV.
+"""
+import io
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# Add the project root to the path to import utils when run directly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.columnar_history import load_columns, read_meta, write_columns
+from utils.price_schema import PRICE_COLUMNS, REPLACES_COLUMN, append_prices
+
+# Log columns: a price row plus the seq of the row it supersedes, if any
+LOG_COLUMNS = PRICE_COLUMNS + (REPLACES_COLUMN,)
+
+class PriceLog:
+    """
+    Price history persisted as a snapshot CSV plus an append-only CSV log
+    
+    Every row carries a seq number. Log rows with a seq already in the
+    snapshot are skipped on replay, so a crash between writing a new
+    snapshot and truncating the log does not duplicate rows. A modified row
+    is logged as a new row whose replaces column holds the seq of the row
+    it supersedes; replay drops the superseded row and keeps the replaces
+    value on the new one.
+    """
+    
+    def __init__(self, snapshot_path, log_path, fsync_rows=100, fsync_interval=5.0, compact_rows=5000, columns_dir=None):
+        """
+        Args:
+            snapshot_path: History CSV written on compaction
+            log_path: CSV that new rows are appended to
+            fsync_rows: Unsynced rows that force an fsync
+            fsync_interval: Seconds after which unsynced rows are fsynced
+            compact_rows: Log rows that trigger a compaction
+            columns_dir: Directory for a columnar copy of the snapshot, or
+                None to always read the CSV
+        """
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.columns_dir = columns_dir
+        self.fsync_rows = fsync_rows
+        self.fsync_interval = fsync_interval
+        self.compact_rows = compact_rows
+        self._lock = threading.Lock()
+        self._file = None
+        self._columns = None
+        self._log_rows = 0
+        self._unsynced_rows = 0
+        self._last_sync = time.monotonic()
+        self.stats = {'appends': 0, 'rows_appended': 0, 'fsyncs': 0, 'compactions': 0}
+    
+    def load(self):
+        """
+        Replay the snapshot and the log into one price history frame
+        
+        Returns:
+            DataFrame with a seq column, or None if there is no snapshot
+        """
+        if not os.path.exists(self.snapshot_path):
+            return None
+        
+        price_data = self._load_snapshot()
+        
+        with self._lock:
+            logged = self._read_log()
+            self._log_rows = len(logged) if logged is not None else 0
+        if logged is None or logged.empty:
+            return price_data
+        
+        snapshot_seq = int(price_data['seq'].max()) if len(price_data) else 0
+        logged = logged[logged['seq'] > snapshot_seq]
+        replaced = logged[REPLACES_COLUMN].dropna() if REPLACES_COLUMN in logged.columns else ()
+        replaced = replaced[replaced > 0] if len(replaced) else ()
+        price_data = append_prices(price_data, logged)
+        if len(replaced):
+            price_data = price_data[~price_data['seq'].isin(replaced)]
+        return price_data.sort_values('date', kind='stable').reset_index(drop=True)
+    
+    def _snapshot_stamp(self):
+        """Identity of the snapshot CSV, recorded with the columns built from it"""
+        stat = os.stat(self.snapshot_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    
+    def _load_snapshot(self):
+        """
+        Load the snapshot, from the column files when they match the CSV
+        
+        When the columns are missing or were built from another version of
+        the CSV, the CSV is parsed once and the columns are rebuilt.
+        """
+        if self.columns_dir is not None:
+            meta = read_meta(self.columns_dir)
+            if meta is not None and meta['stamp'] == self._snapshot_stamp():
+                price_data = load_columns(self.columns_dir)
+                if price_data is not None:
+                    return price_data
+        
+        price_data = pd.read_csv(self.snapshot_path)
+        if 'seq' not in price_data.columns:
+            # Histories written before rows carried a sequence number: number them in file order
+            price_data['seq'] = np.arange(1, len(price_data) + 1, dtype=np.int64)
+        
+        if self.columns_dir is None:
+            return price_data
+        write_columns(self.columns_dir, price_data, stamp=self._snapshot_stamp())
+        return load_columns(self.columns_dir)
+    
+    def _read_log(self):
+        """Read the log, dropping a final line left incomplete by a crash (caller holds the lock)"""
+        if not os.path.exists(self.log_path):
+            return None
+        
+        with open(self.log_path, 'r', newline='') as f:
+            text = f.read()
+        complete = text[:text.rfind('\n') + 1]
+        if not complete:
+            return None
+        
+        logged = pd.read_csv(io.StringIO(complete))
+        self._columns = list(logged.columns)
+        return logged
+    
+    def append(self, rows):
+        """
+        Append new rows to the log
+        
+        Each append is flushed to the OS; fsyncs are batched by row count and
+        time.
+        
+        Args:
+            rows: DataFrame of rows, including their seq column and, for
+                modified rows, a replaces column
+        """
+        if rows is None or rows.empty:
+            return
+        
+        with self._lock:
+            if self._file is None:
+                new_file = not os.path.exists(self.log_path) or os.path.getsize(self.log_path) == 0
+                if not new_file:
+                    logged = self._read_log()
+                    if logged is not None and REPLACES_COLUMN not in logged.columns:
+                        # Log written before modified rows were logged: add the column
+                        self._rewrite_log(logged)
+                self._file = open(self.log_path, 'a', newline='')
+                if new_file:
+                    self._columns = list(LOG_COLUMNS)
+                    self._file.write(','.join(self._columns) + '\n')
+            
+            columns = self._columns or list(rows.columns)
+            rows.reindex(columns=columns).to_csv(self._file, header=False, index=False)
+            self._file.flush()
+            
+            self._log_rows += len(rows)
+            self._unsynced_rows += len(rows)
+            self.stats['appends'] += 1
+            self.stats['rows_appended'] += len(rows)
+            
+            if (self._unsynced_rows >= self.fsync_rows
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+    
+    def _rewrite_log(self, logged):
+        """Atomically rewrite the log with LOG_COLUMNS (caller holds the lock)"""
+        tmp_path = self.log_path + '.tmp'
+        with open(tmp_path, 'w', newline='') as f:
+            logged.reindex(columns=list(LOG_COLUMNS)).to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        self._columns = list(LOG_COLUMNS)
+    
+    def _sync(self):
+        """fsync the log (caller holds the lock)"""
+        if self._file is not None and self._unsynced_rows:
+            os.fsync(self._file.fileno())
+            self.stats['fsyncs'] += 1
+        self._unsynced_rows = 0
+        self._last_sync = time.monotonic()
+    
+    def sync(self):
+        """fsync any rows appended since the last sync"""
+        with self._lock:
+            self._sync()
+    
+    def needs_compaction(self):
+        """Whether the log has grown past compact_rows"""
+        with self._lock:
+            return self._log_rows >= self.compact_rows
+    
+    def compact(self, price_data):
+        """
+        Write the full history as the new snapshot and empty the log
+        
+        The snapshot (and its columns) are written and swapped in before the
+        log is truncated, so a crash at any point leaves a replayable state.
+        
+        Args:
+            price_data: Current price history, including every logged row
+        """
+        with self._lock:
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', newline='') as f:
+                price_data.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            if self.columns_dir is not None:
+                write_columns(self.columns_dir, price_data, stamp=self._snapshot_stamp())
+            
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.log_path, 'w'):
+                pass
+            self._columns = None
+            self._log_rows = 0
+            self._unsynced_rows = 0
+            self._last_sync = time.monotonic()
+            self.stats['compactions'] += 1
+    
+    def close(self):
+        """fsync and close the log"""
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def get_stats(self):
+        """Get log statistics"""
+        with self._lock:
+            return {**self.stats, 'log_rows': self._log_rows, 'unsynced_rows': self._unsynced_rows}
+
+if __name__ == '__main__':
+    # Per-scrape persistence cost: full CSV rewrite versus a log append
+    import tempfile
+    
+    n_days = 5000
+    dates = np.repeat(pd.date_range('2012-01-01', periods=n_days, freq='D'), 3)
+    history = pd.DataFrame({
+        'date': dates,
+        'material': np.tile(['Copper', 'Aluminum', 'Steel'], n_days),
+        'price': np.random.uniform(60000, 750000, len(dates)).round(2),
+        'volume': np.random.randint(1000, 10000, len(dates)),
+        'source': 'Market Data',
+        'seq': np.arange(1, len(dates) + 1)
+    })
+    new_rows = history.tail(3).assign(seq=history['seq'].max() + np.arange(1, 4))
+    
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, 'prices.csv')
+        log = PriceLog(snapshot_path, os.path.join(directory, 'prices_log.csv'))
+        log.compact(history)
+        
+        rounds = 50
+        start = time.perf_counter()
+        for _ in range(rounds):
+            history.to_csv(os.path.join(directory, 'rewrite.csv'), index=False)
+        rewrite = (time.perf_counter() - start) / rounds
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            log.append(new_rows)
+        append = (time.perf_counter() - start) / rounds
+        log.close()
+        
+        replayed = log.load()
+        print(f"{len(history):,} rows: rewrite {rewrite * 1000:.2f} ms, append {append * 1000:.3f} ms "
+              f"({rewrite / append:.0f}x less per scrape)")
+        print(f"replayed {len(replayed):,} rows, stats: {log.get_stats()}")
@@ -0,0 +1,159 @@
+"""
+Canonical typed schema for the in-memory price history
+
+Every price frame the app publishes goes through normalize_prices (at load)
+or append_prices (at ingest), so the history always has the same compact
+dtypes: categorical material and source, datetime64[ns] dates and numeric
+columns, optionally downcast to 32 bits.
+"""
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('date', 'material', 'price', 'volume', 'source', 'seq')
+
+# Optional column: seq of the row a modified price superseded (0 for none)
+REPLACES_COLUMN = 'replaces'
+
+def price_dtypes(float32=False):
+    """
+    Get the canonical dtype of each price column
+    
+    Args:
+        float32: Store prices as float32 and volumes as int32. Halves their
+            memory; prices keep about 7 significant digits (steps of 0.0625
+            at 700,000).
+    """
+    return {
+        'date': np.dtype('datetime64[ns]'),
+        'material': 'category',
+        'price': np.dtype(np.float32 if float32 else np.float64),
+        'volume': np.dtype(np.int32 if float32 else np.int64),
+        'source': 'category',
+        'seq': np.dtype(np.int64),
+        REPLACES_COLUMN: np.dtype(np.int64)
+    }
+
+def _convert(column, dtype):
+    """Convert one column to dtype, leaving it untouched if it already matches"""
+    if dtype == 'category':
+        return column if isinstance(column.dtype, pd.CategoricalDtype) else column.astype('category')
+    if column.dtype == dtype:
+        return column
+    if dtype.kind == 'M':
+        return pd.to_datetime(column, format='ISO8601').astype(dtype)
+    return column.astype(dtype)
+
+def normalize_prices(df, float32=False):
+    """
+    Convert a price frame to the canonical schema
+    
+    Columns that already have the right dtype are kept as they are (no
+    copy), so normalizing an already typed or memory-mapped frame is cheap.
+    Missing replaces values become 0. Columns outside the schema are kept
+    after the canonical ones.
+    
+    Args:
+        df: Price history with date, material, price, volume and source
+            (and usually seq, optionally replaces) columns
+        float32: See price_dtypes
+    
+    Returns:
+        A new DataFrame; df is not modified
+    """
+    dtypes = price_dtypes(float32)
+    if REPLACES_COLUMN in df.columns and df[REPLACES_COLUMN].hasnans:
+        df = df.assign(**{REPLACES_COLUMN: df[REPLACES_COLUMN].fillna(0)})
+    columns = {
+        name: _convert(df[name], dtypes[name])
+        for name in PRICE_COLUMNS + (REPLACES_COLUMN,) if name in df.columns
+    }
+    for name in df.columns:
+        if name not in columns:
+            columns[name] = df[name]
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+def append_prices(existing, new_rows, float32=None):
+    """
+    Append rows to a normalized price frame, keeping the schema
+    
+    The new rows are normalized first and categories are merged before
+    concatenating, so material and source stay categorical instead of
+    falling back to object strings.
+    
+    Args:
+        existing: Normalized price history
+        new_rows: DataFrame of rows to add (any dtypes)
+        float32: See price_dtypes; by default follows existing's price dtype
+    
+    Returns:
+        A new DataFrame with a fresh RangeIndex
+    """
+    if float32 is None:
+        float32 = 'price' in existing.columns and existing['price'].dtype == np.float32
+    existing = normalize_prices(existing, float32)
+    new_rows = normalize_prices(new_rows, float32)
+    
+    for name in ('material', 'source'):
+        if name in existing.columns and name in new_rows.columns:
+            categories = existing[name].cat.categories.union(new_rows[name].cat.categories)
+            existing = existing.assign(**{name: existing[name].cat.set_categories(categories)})
+            new_rows = new_rows.assign(**{name: new_rows[name].cat.set_categories(categories)})
+    
+    # Rows without a replaces column supersede nothing
+    if REPLACES_COLUMN in existing.columns and REPLACES_COLUMN not in new_rows.columns:
+        new_rows = new_rows.assign(**{REPLACES_COLUMN: np.zeros(len(new_rows), dtype=np.int64)})
+    elif REPLACES_COLUMN in new_rows.columns and REPLACES_COLUMN not in existing.columns:
+        existing = existing.assign(**{REPLACES_COLUMN: np.zeros(len(existing), dtype=np.int64)})
+    
+    return pd.concat([existing, new_rows], ignore_index=True)
+
+if __name__ == '__main__':
+    # Memory and lookup latency of the object-string frame read_csv returns
+    # versus the typed schema, on a synthetic 1M-row history
+    import sys
+    import time
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.price_index import PriceIndex
+    
+    n_rows = 1_000_000
+    materials = ['Copper', 'Aluminum', 'Steel']
+    n_days = n_rows // len(materials)
+    raw = pd.DataFrame({
+        'date': np.repeat(pd.date_range('2000-01-01', periods=n_days, freq='h'), len(materials)).strftime('%Y-%m-%d %H:%M:%S'),
+        'material': np.tile(materials, n_days),
+        'price': np.random.uniform(60000, 750000, n_days * len(materials)).round(2),
+        'volume': np.random.randint(1000, 10000, n_days * len(materials)),
+        'source': np.random.choice(['Market Data', 'Real-time API'], n_days * len(materials))
+    })
+    raw['seq'] = np.arange(1, len(raw) + 1)
+    # read_csv returns text columns as object strings
+    raw = raw.astype({'date': object, 'material': object, 'source': object})
+    
+    def measure(name, df):
+        memory = df.memory_usage(deep=True).sum() / 2 ** 20
+        
+        start = time.perf_counter()
+        for _ in range(10):
+            df[df['material'] == 'Copper']
+        filtering = (time.perf_counter() - start) / 10
+        
+        start = time.perf_counter()
+        pd.to_datetime(df['date'], format='ISO8601')
+        parsing = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        PriceIndex(df)
+        indexing = time.perf_counter() - start
+        
+        print(f"{name:>8}: {memory:6.1f} MB, material filter {filtering * 1000:6.1f} ms, "
+              f"date parse {parsing * 1000:6.1f} ms, index build {indexing * 1000:6.1f} ms")
+    
+    start = time.perf_counter()
+    typed = normalize_prices(raw)
+    normalize = time.perf_counter() - start
+    
+    print(f"{len(raw):,} rows (normalize_prices took {normalize * 1000:.0f} ms)")
+    measure('object', raw)
+    measure('typed', typed)
+    measure('float32', normalize_prices(raw, float32=True))
@@ -17,6 +17,7 @@ import os
 # Add the project root to the path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import USD_TO_INR_RATE
+from utils.price_schema import append_prices
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -430,19 +431,28 @@ class CommodityPriceScraper:
         """
         Update existing price data with new real-time prices
         """
+        return self.merge_price_rows(existing_df, self.fetch_latest_rows())
+    
+    def fetch_latest_rows(self) -> List[Dict]:
+        """
+        Fetch current prices as new price rows
+        
+        This is the slow, network-bound half of update_price_data; it touches
+        no shared state, so callers run it without holding any lock.
+        """
         # Get current prices
         current_prices = self.get_all_prices()
         
-        # Get current datetime
+        # Get current datetime; ticks keep their time of day, so several
+        # scrapes on one day stay distinct (see utils/rollups.py)
         now = datetime.now()
-        current_date = now.strftime('%Y-%m-%d')
         current_time = now.strftime('%Y-%m-%d %H:%M:%S')
         
         new_rows = []
         for material, price in current_prices.items():
             # Always add a new row with current timestamp
             new_rows.append({
-                'date': current_date,
+                'date': current_time,
                 'material': material,
                 'price': float(price),
                 'volume': int(np.random.randint(1000, 5000)),
@@ -451,17 +461,35 @@ class CommodityPriceScraper:
             
             logger.info(f"Updated {material}: ₹{price:,.2f}/ton at {current_time}")
         
-        if new_rows:
-            new_df = pd.DataFrame(new_rows)
-            existing_df = pd.concat([existing_df, new_df], ignore_index=True)
-            
-            # Keep only last 90 days of data to prevent bloat
-            existing_df['date'] = pd.to_datetime(existing_df['date'])
-            cutoff_date = now - pd.Timedelta(days=90)
-            existing_df = existing_df[existing_df['date'] >= cutoff_date]
-            
-            # Sort by date
-            existing_df = existing_df.sort_values('date').reset_index(drop=True)
+        return new_rows
+    
+    @staticmethod
+    def merge_price_rows(existing_df: pd.DataFrame, new_rows: List[Dict], now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Append fetched rows to the price history
+        
+        Pure and fast (no I/O): returns a new DataFrame and leaves existing_df
+        unchanged, keeping only the last 90 days of data. When the history has
+        a seq column, new rows continue its sequence. The result has the
+        typed schema of utils/price_schema.py.
+        """
+        if not new_rows:
+            return existing_df
+        
+        now = now or datetime.now()
+        new_df = pd.DataFrame(new_rows)
+        
+        if 'seq' in existing_df.columns:
+            next_seq = int(existing_df['seq'].max()) + 1 if len(existing_df) else 1
+            new_df['seq'] = np.arange(next_seq, next_seq + len(new_df), dtype=np.int64)
+        existing_df = append_prices(existing_df, new_df)
+        
+        # Keep only last 90 days of data to prevent bloat
+        cutoff_date = now - pd.Timedelta(days=90)
+        existing_df = existing_df[existing_df['date'] >= cutoff_date]
+        
+        # Sort by date; stable, so rows sharing a timestamp keep arrival order
+        existing_df = existing_df.sort_values('date', kind='stable').reset_index(drop=True)
         
         return existing_df
 
@@ -0,0 +1,276 @@
+"""
+Shared JSON encoding, vectorized serialization and encoded payload caching
+
+Every JSON writer in the app (Flask responses, the PO store, alert and
+forecast cache persistence, the event stream) goes through encode_json, which
+encodes NumPy and pandas values directly instead of pre-walking the data to
+convert them.
+"""
+import json
+import threading
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_default(obj):
+    """
+    Encode values the json module does not know: NumPy scalars and arrays,
+    pandas timestamps, Series and DataFrames, and dates
+    """
+    if isinstance(obj, np.datetime64):
+        return pd.Timestamp(obj).isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient='records')
+    if obj is pd.NaT:
+        return None
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def encode_json(obj, indent=None, sort_keys=True):
+    """
+    Encode an object as JSON bytes
+    
+    Uses orjson when it is installed (NumPy arrays and scalars are encoded
+    natively; NaN becomes null), otherwise the json module with json_default.
+    
+    Args:
+        obj: Object to encode
+        indent: 2 for pretty-printed files, None for compact output
+        sort_keys: Sort object keys (matches the output of Flask's jsonify)
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=json_default, option=option)
+    
+    separators = None if indent else (',', ':')
+    return json.dumps(
+        obj, default=json_default, sort_keys=sort_keys, indent=indent, separators=separators
+    ).encode('utf-8')
+
+def write_json(path, obj, indent=2):
+    """Write an object to a JSON file (key order preserved)"""
+    with open(path, 'wb') as f:
+        f.write(encode_json(obj, indent=indent, sort_keys=False))
+
+def _column_as_strings(column):
+    """Convert a date or text column to a list of str in one pass"""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        # Like to_csv: plain dates when no value has a time of day
+        date_only = (column.dt.normalize() == column).all()
+        return column.dt.strftime('%Y-%m-%d' if date_only else '%Y-%m-%d %H:%M:%S').tolist()
+    return column.astype(str).tolist()
+
+def date_string(value):
+    """Format one date like history columns are formatted (no time at midnight)"""
+    value = pd.Timestamp(value)
+    return value.strftime('%Y-%m-%d' if value == value.normalize() else '%Y-%m-%d %H:%M:%S')
+
+HISTORY_COLUMNS = ('date', 'material', 'price', 'volume', 'source')
+
+def price_columns(frame, columns=HISTORY_COLUMNS):
+    """
+    Convert price history columns to lists of native Python values
+    
+    Each column is converted once, instead of casting every cell of every row.
+    
+    Returns:
+        Dict of column name -> list
+    """
+    converted = {}
+    for column in columns:
+        if column == 'price':
+            converted[column] = frame[column].to_numpy(dtype=np.float64).tolist()
+        elif column in ('volume', 'seq'):
+            converted[column] = frame[column].to_numpy(dtype=np.int64).tolist()
+        elif column == 'replaces':
+            # Seq of the superseded row; None for rows that supersede none
+            replaced = frame[column].fillna(0).to_numpy(dtype=np.int64).tolist() if column in frame else [0] * len(frame)
+            converted[column] = [seq or None for seq in replaced]
+        else:
+            converted[column] = _column_as_strings(frame[column])
+    return converted
+
+def history_records(frame, columns=HISTORY_COLUMNS):
+    """
+    Convert a price history frame to JSON-ready dicts
+    """
+    converted = price_columns(frame, columns)
+    return [dict(zip(columns, values)) for values in zip(*(converted[column] for column in columns))]
+
+def history_payload(material, frame, **fields):
+    """
+    Encode the /api/prices/historical response body for a material
+    
+    Args:
+        material: Material name
+        frame: Rows to return
+        fields: Extra top-level response fields
+    """
+    history = history_records(frame)
+    return encode_json({
+        'material': material,
+        'history': history,
+        'count': len(history),
+        **fields
+    })
+
+def ohlc_payload(material, resolution, bars, **fields):
+    """
+    Encode the /api/prices/ohlc response body for a material
+    
+    Args:
+        material: Material name
+        resolution: Bar resolution ('hourly' or 'daily')
+        bars: Dict of bar field -> array, as returned by PriceRollups.bars_for
+        fields: Extra top-level response fields
+    """
+    columns = {
+        'time': _column_as_strings(pd.Series(bars['time'])),
+        **{field: bars[field].tolist() for field in ('open', 'high', 'low', 'close', 'volume', 'ticks')}
+    }
+    return encode_json({
+        'material': material,
+        'resolution': resolution,
+        'bars': [dict(zip(columns, values)) for values in zip(*columns.values())],
+        'count': len(columns['time']),
+        **fields
+    })
+
+class PayloadCache:
+    """
+    Encoded response bodies keyed by (kind, material) and data version
+    
+    A lookup with a different version than the stored one is a miss, so
+    callers never have to invalidate entries explicitly. Once max_entries is
+    reached the oldest entry is evicted.
+    """
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, kind, material, version):
+        """Get a cached payload, or None if missing or built for another version"""
+        with self._lock:
+            entry = self._payloads.get((kind, material))
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+    
+    def put(self, kind, material, version, payload):
+        """Store a payload for a data version"""
+        with self._lock:
+            key = (kind, material)
+            self._payloads.pop(key, None)
+            if len(self._payloads) >= self.max_entries:
+                # Dicts keep insertion order, so the first key is the oldest
+                del self._payloads[next(iter(self._payloads))]
+            self._payloads[key] = (version, payload)
+    
+    def get_or_build(self, kind, material, version, build):
+        """
+        Get a cached payload, building and storing it on a miss
+        
+        Args:
+            kind: Payload kind (e.g. 'history', 'forecast')
+            material: Material name
+            version: Version of the data the payload is built from
+            build: Callable returning the encoded payload
+        """
+        payload = self.get(kind, material, version)
+        if payload is None:
+            payload = build()
+            self.put(kind, material, version, payload)
+        return payload
+    
+    def get_stats(self):
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                'entries': len(self._payloads),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+if __name__ == '__main__':
+    # Per-response cost of the old pre-walk converters versus encode_json
+    import time
+    
+    def convert_to_serializable(obj):
+        """The recursive converter app.py ran before every response"""
+        if isinstance(obj, dict):
+            return {key: convert_to_serializable(value) for key, value in obj.items()}
+        elif isinstance(obj, list):
+            return [convert_to_serializable(item) for item in obj]
+        elif isinstance(obj, (np.integer, np.int64, np.int32)):
+            return int(obj)
+        elif isinstance(obj, (np.floating, np.float64, np.float32)):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return obj
+    
+    def recommendation(material):
+        return {
+            'material': material,
+            'current_price': np.float64(712345.67),
+            'avg_forecast_price': np.float64(709876.54),
+            'min_forecast_price': np.float64(701234.56),
+            'price_change_pct': np.float64(-0.35),
+            'recommendation': 'WAIT',
+            'reason': 'Price may drop. Wait for better opportunity',
+            'confidence': 'Medium',
+            'best_day_to_buy': np.int64(4),
+            'potential_savings': np.float64(11111.11)
+        }
+    
+    payloads = {
+        'recommendations': {
+            'recommendations': [recommendation(f'Material {i}') for i in range(20)],
+            'timestamp': datetime.now().isoformat()
+        },
+        'vendors': {
+            'vendors': [
+                {'name': f'Vendor {i}', 'price': np.float64(700000 + i), 'rating': np.float64(4.2),
+                 'delivery_days': np.int64(7 + i), 'min_order': np.int64(50)}
+                for i in range(50)
+            ]
+        }
+    }
+    
+    rounds = 2000
+    print(f"JSON backend: {'orjson' if orjson is not None else 'json'}")
+    for name, payload in payloads.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            json.dumps(convert_to_serializable(payload), sort_keys=True, separators=(',', ':'))
+        before = (time.perf_counter() - start) / rounds
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            encode_json(payload)
+        after = (time.perf_counter() - start) / rounds
+        
+        print(f"{name}: pre-walk + json {before * 1e6:.1f} us, encode_json {after * 1e6:.1f} us "
+              f"({before / after:.1f}x faster)")
@@ -0,0 +1,360 @@
+"""
+SQLite storage backend for price history, inventory and vendors
+
+Used when STORAGE_BACKEND is 'sqlite'. The database runs in WAL mode, so
+several backend processes can share it: readers never block the writer, and
+writers serialize on BEGIN IMMEDIATE. Every write transaction bumps a
+revision counter that processes poll to notice each other's changes.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+PRICE_COLUMNS = ('date', 'material', 'price', 'volume', 'source', 'seq')
+
+# Every stored price column; replaces is the seq a modified row superseded (0 for none)
+STORED_COLUMNS = PRICE_COLUMNS + ('replaces',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    seq INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    material TEXT NOT NULL,
+    price REAL NOT NULL,
+    volume INTEGER,
+    source TEXT,
+    replaces INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_prices_material_date ON prices (material, date);
+CREATE TABLE IF NOT EXISTS inventory (
+    material TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vendors (
+    material TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+"""
+
+def format_date(value):
+    """Format a date the way it is stored, so text comparison is chronological"""
+    return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+class SQLiteStore:
+    """
+    Price history, inventory and vendors in one SQLite database
+    
+    Each thread gets its own connection. Price lookups by material and date
+    range go through the (material, date) index instead of scanning the
+    whole history.
+    """
+    
+    def __init__(self, path, busy_timeout=5000):
+        """
+        Args:
+            path: Database file
+            busy_timeout: Milliseconds to wait for another process's write lock
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(prices)')}
+        if 'replaces' not in columns:
+            # Database created before modified rows recorded what they replace
+            conn.execute('ALTER TABLE prices ADD COLUMN replaces INTEGER NOT NULL DEFAULT 0')
+    
+    def _connection(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @contextmanager
+    def _transaction(self, write=False):
+        """
+        Run statements in one transaction
+        
+        Read transactions see one consistent version of the database. Write
+        transactions take the write lock up front and bump the revision.
+        """
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+        try:
+            yield conn
+            if write:
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def revision(self):
+        """Get the revision counter, bumped by every write from any process"""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0]
+    
+    def has_data(self):
+        """Whether price history has been stored (i.e. migration has run)"""
+        return self._connection().execute('SELECT EXISTS (SELECT 1 FROM prices)').fetchone()[0] == 1
+    
+    def import_data(self, price_data, inventory_data=None, vendor_data=None):
+        """
+        One-shot migration of the file-based data
+        
+        Does nothing if another process migrated first.
+        
+        Returns:
+            True if the data was imported
+        """
+        with self._transaction(write=True) as conn:
+            if conn.execute('SELECT EXISTS (SELECT 1 FROM prices)').fetchone()[0]:
+                return False
+            
+            conn.executemany(
+                'INSERT INTO prices (date, material, price, volume, source, seq, replaces) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                self._price_records(price_data)
+            )
+            for table, documents in (('inventory', inventory_data), ('vendors', vendor_data)):
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO {table} (material, data) VALUES (?, ?)',
+                    [(material, json.dumps(data)) for material, data in (documents or {}).items()]
+                )
+        return True
+    
+    def _price_records(self, rows, first_seq=None):
+        """Convert price rows to insert parameters, optionally renumbering seq from first_seq"""
+        dates = pd.to_datetime(rows['date'], format='ISO8601').dt.strftime(DATE_FORMAT)
+        if first_seq is None:
+            seqs = rows['seq'].to_numpy(dtype=np.int64).tolist()
+        else:
+            seqs = range(first_seq, first_seq + len(rows))
+        if 'replaces' in rows.columns:
+            replaces = rows['replaces'].fillna(0).to_numpy(dtype=np.int64).tolist()
+        else:
+            replaces = [0] * len(rows)
+        return list(zip(
+            dates.tolist(),
+            rows['material'].astype(str).tolist(),
+            rows['price'].to_numpy(dtype=np.float64).tolist(),
+            rows['volume'].to_numpy(dtype=np.int64).tolist(),
+            rows['source'].astype(str).tolist(),
+            seqs,
+            replaces
+        ))
+    
+    def load(self):
+        """
+        Read everything into the in-memory representation used by the app
+        
+        Returns:
+            Tuple of (dict with price_data, inventory_data and vendor_data, revision)
+        """
+        with self._transaction() as conn:
+            price_data = pd.read_sql_query(
+                f"SELECT {', '.join(STORED_COLUMNS)} FROM prices ORDER BY date, seq", conn
+            )
+            inventory_data = {material: json.loads(data) for material, data in conn.execute('SELECT material, data FROM inventory')}
+            vendor_data = {material: json.loads(data) for material, data in conn.execute('SELECT material, data FROM vendors')}
+            revision = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+        
+        data = {'price_data': price_data, 'inventory_data': inventory_data, 'vendor_data': vendor_data}
+        return data, revision
+    
+    def append_prices(self, rows, keep_from=None):
+        """
+        Insert new price rows and drop rows that fell out of retention
+        
+        Rows keep their seq unless another process already used it, in which
+        case they are numbered after the stored maximum. A row with a
+        replaces value supersedes the stored row with that seq (a modified
+        price), which is deleted.
+        
+        Args:
+            rows: DataFrame of new rows, including seq and optionally replaces
+            keep_from: Delete rows dated before this
+        
+        Returns:
+            Tuple of (revision before, revision after) the write
+        """
+        with self._transaction(write=True) as conn:
+            before = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+            if len(rows) and 'replaces' in rows.columns:
+                replaced = rows['replaces'].dropna().astype(np.int64)
+                replaced = replaced[replaced > 0].tolist()
+                conn.executemany('DELETE FROM prices WHERE seq = ?', [(seq,) for seq in replaced])
+            if len(rows):
+                next_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM prices').fetchone()[0]
+                first_seq = int(rows['seq'].min())
+                conn.executemany(
+                    'INSERT INTO prices (date, material, price, volume, source, seq, replaces) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    self._price_records(rows, None if first_seq >= next_seq else next_seq)
+                )
+            if keep_from is not None:
+                conn.execute('DELETE FROM prices WHERE date < ?', (format_date(keep_from),))
+        return before, before + 1
+    
+    def history(self, material, start=None, end=None):
+        """
+        Get a material's rows between two dates (an index range scan)
+        
+        Args:
+            material: Material name
+            start: First date to include (None for the beginning)
+            end: Last date to include (None for the latest row)
+        
+        Returns:
+            Tuple of (frame, datetime64 dates, float prices) in date order
+        """
+        query = f"SELECT {', '.join(PRICE_COLUMNS)} FROM prices WHERE material = ?"
+        params = [material]
+        if start is not None:
+            query += ' AND date >= ?'
+            params.append(format_date(start))
+        if end is not None:
+            query += ' AND date <= ?'
+            params.append(format_date(end))
+        
+        frame = pd.read_sql_query(query + ' ORDER BY date, seq', self._connection(), params=params)
+        dates = pd.to_datetime(frame['date'], format=DATE_FORMAT).values.astype('datetime64[ns]')
+        # Parsed dates, so the frame serializes like the in-memory history
+        frame['date'] = dates
+        return frame, dates, frame['price'].to_numpy(dtype=np.float64)
+    
+    def latest(self, material):
+        """
+        Get the latest row summary for a material (reads two index entries)
+        
+        Returns:
+            Dict with price, prev_price, date, volume and source, or None for
+            unknown materials
+        """
+        rows = self._connection().execute(
+            'SELECT price, date, volume, source FROM prices WHERE material = ? ORDER BY date DESC, seq DESC LIMIT 2',
+            (material,)
+        ).fetchall()
+        if not rows:
+            return None
+        
+        price, date, volume, source = rows[0]
+        return {
+            'price': price,
+            'prev_price': rows[1][0] if len(rows) > 1 else None,
+            'date': date,
+            'volume': volume,
+            'source': source
+        }
+    
+    def latest_price(self, material):
+        """Get a material's latest price"""
+        latest = self.latest(material)
+        return latest['price'] if latest else None
+    
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class RevisionReader:
+    """
+    Price lookups answered from one revision of the store
+    
+    Each lookup runs in a read transaction that first checks the revision;
+    if another process has written since, the lookup is answered by the
+    fallback (e.g. the in-memory index of the same data) instead. Offers
+    the latest(), latest_price() and history() of SQLiteStore.
+    """
+    
+    def __init__(self, store, revision, fallback):
+        """
+        Args:
+            store: SQLiteStore
+            revision: Revision whose data lookups must return
+            fallback: Object with the same lookups over that data
+        """
+        self.store = store
+        self.revision = revision
+        self.fallback = fallback
+    
+    def _read(self, name, *args, **kwargs):
+        """Run a lookup on the store if it is still at revision, else on the fallback"""
+        with self.store._transaction() as conn:
+            if conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0] == self.revision:
+                return getattr(self.store, name)(*args, **kwargs)
+        return getattr(self.fallback, name)(*args, **kwargs)
+    
+    def history(self, material, start=None, end=None):
+        return self._read('history', material, start, end)
+    
+    def latest(self, material):
+        return self._read('latest', material)
+    
+    def latest_price(self, material):
+        return self._read('latest_price', material)
+
+if __name__ == '__main__':
+    # Indexed range query versus filtering the whole history frame
+    import tempfile
+    import time
+    
+    materials = [f'Material {i}' for i in range(20)]
+    n_days = 5000
+    history = pd.DataFrame({
+        'date': np.repeat(pd.date_range('2012-01-01', periods=n_days, freq='D'), len(materials)),
+        'material': np.tile(materials, n_days),
+        'price': np.random.uniform(60000, 750000, n_days * len(materials)).round(2),
+        'volume': np.random.randint(1000, 10000, n_days * len(materials)),
+        'source': 'Market Data'
+    })
+    history['seq'] = np.arange(1, len(history) + 1)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStore(os.path.join(directory, 'procurement.db'))
+        store.import_data(history)
+        
+        start, end = pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-31')
+        rounds = 50
+        
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            history[(history['material'] == materials[3]) & (history['date'] >= start) & (history['date'] <= end)]
+        scan = (time.perf_counter() - begin) / rounds
+        
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            frame, _, _ = store.history(materials[3], start, end)
+        indexed = (time.perf_counter() - begin) / rounds
+        
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            store.latest(materials[3])
+        latest = (time.perf_counter() - begin) / rounds
+        
+        print(f"{len(history):,} rows, {len(frame)} in range: frame filter {scan * 1000:.2f} ms, "
+              f"indexed query {indexed * 1000:.2f} ms, latest {latest * 1e6:.0f} us")
+        store.close()
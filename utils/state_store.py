@@ -0,0 +1,122 @@
+"""
+Copy-on-write store for the price, inventory and vendor state served by the API
+"""
+import threading
+
+from utils.price_index import PriceIndex
+from utils.rollups import PriceRollups
+
+# Snapshot field -> version counter bumped when it is replaced
+VERSIONED_FIELDS = {
+    'price_data': 'price',
+    'inventory_data': 'inventory',
+    'vendor_data': 'vendor'
+}
+
+class Snapshot:
+    """
+    One immutable generation of the served state
+    
+    Nothing reachable from a published snapshot is modified afterwards;
+    writers copy what they change and publish a new snapshot instead. That
+    is what lets readers use a snapshot without holding any lock.
+    """
+    
+    __slots__ = (
+        'price_data', 'inventory_data', 'vendor_data', 'versions',
+        '_price_index', '_index_lock', '_rollups', '_prior_rollups', '_rollups_lock'
+    )
+    
+    def __init__(self, price_data=None, inventory_data=None, vendor_data=None, versions=None):
+        self.price_data = price_data
+        self.inventory_data = inventory_data if inventory_data is not None else {}
+        self.vendor_data = vendor_data if vendor_data is not None else {}
+        self.versions = versions or {kind: 0 for kind in VERSIONED_FIELDS.values()}
+        self._price_index = None
+        self._index_lock = threading.Lock()
+        self._rollups = None
+        # Rollups of an earlier snapshot, advanced instead of rebuilt
+        self._prior_rollups = None
+        self._rollups_lock = threading.Lock()
+    
+    @property
+    def price_index(self):
+        """Per-material index over price_data, built on first use"""
+        if self._price_index is None:
+            with self._index_lock:
+                if self._price_index is None:
+                    self._price_index = PriceIndex(self.price_data, version=self.versions['price'])
+        return self._price_index
+    
+    @property
+    def rollups(self):
+        """Hourly and daily OHLC bars over price_data, built on first use"""
+        if self._rollups is None:
+            price_index = self.price_index
+            with self._rollups_lock:
+                if self._rollups is None:
+                    prior = self._prior_rollups
+                    if prior is not None:
+                        self._rollups = prior.advance(price_index)
+                    else:
+                        self._rollups = PriceRollups.build(price_index)
+                    self._prior_rollups = None
+        return self._rollups
+
+class StateStore:
+    """
+    Holds the current Snapshot and publishes replacements atomically
+    
+    Readers call snapshot() and keep using the returned object for the whole
+    request. Writers serialize on writing() so that read-modify-publish
+    sequences do not lose each other's changes.
+    """
+    
+    def __init__(self):
+        self._snapshot = Snapshot()
+        self._write_lock = threading.RLock()
+    
+    def snapshot(self):
+        """Get the current snapshot (lock-free)"""
+        return self._snapshot
+    
+    def writing(self):
+        """Context manager that excludes other writers"""
+        return self._write_lock
+    
+    def publish(self, **changes):
+        """
+        Publish a new snapshot with some fields replaced
+        
+        Args:
+            changes: New values for price_data, inventory_data and/or vendor_data.
+                Each replaced field's version is incremented.
+        
+        Returns:
+            The published Snapshot
+        """
+        unknown = set(changes) - set(VERSIONED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        
+        with self._write_lock:
+            current = self._snapshot
+            versions = dict(current.versions)
+            fields = {field: getattr(current, field) for field in VERSIONED_FIELDS}
+            
+            for field, value in changes.items():
+                fields[field] = value
+                versions[VERSIONED_FIELDS[field]] += 1
+            
+            snapshot = Snapshot(versions=versions, **fields)
+            
+            # Keep the built index when prices did not change
+            if 'price_data' not in changes:
+                snapshot._price_index = current._price_index
+                snapshot._rollups = current._rollups
+            # New prices advance the newest rollups built so far instead of rebuilding them
+            snapshot._prior_rollups = current._rollups or current._prior_rollups
+            
+            # Single reference assignment; readers see the old or the new snapshot
+            self._snapshot = snapshot
+            return snapshot